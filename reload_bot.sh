@@ -7,9 +7,10 @@ gh repo sync
 # Need to kill the main thread and the worker threads
 pkill -f "rides_bot.callback_server:app"
 
-# Restart the discord_listener and telegram_listener services
+# Restart the discord_listener, telegram_listener and scheduler services
 sudo systemctl restart discord_listener
 sudo systemctl restart telegram_listener
+sudo systemctl restart scheduler
 
 # Restart the callback_server service, redirecting output to /dev/null
 # Need to add this script's directory to PYTHONPATH
@@ -21,6 +22,7 @@ disown
 # Get the status of the services and print them
 systemctl status discord_listener
 systemctl status telegram_listener
+systemctl status scheduler
 
 # Get the status of the callback_server and print it
 ps aux | grep "rides_bot.callback_server:app"
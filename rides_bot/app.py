@@ -1,560 +1,59 @@
-import datetime, json, sys, random, regex as re
+import datetime, sys
 from pathlib import Path
 
-from supabase import create_client, Client as SupabaseClient
-
 import utils
-import utils.shift_logic as shift_logic
-from utils.nested_json import NestedJSONEncoder
+import utils.singleflight as singleflight
 from utils.config import Config
 from utils.w2w import W2WSession
-from utils.groupme import GroupMe
-from utils.discord import SingleMessageClient
-from utils.telegram import TelegramBot
+from utils.schedule_cache import schedule_cache
+from rides_bot.pipeline import NoShiftsDetectedError
+import rides_bot.pipeline as pipeline
 
 CONFIG_FILE_PATH = (Path(__file__).parent.parent / "config.yaml").resolve()
 
 
-class NoShiftsDetectedError(Exception):
-    pass
-
-def normalize_name(string: str) -> str:
-    # Remove from the first occurrence of '(' to the end of the string in last names
-    string = re.sub(r"\(.*$", "", string)
-    # Remove extra whitespace
-    return string.strip()
-
-def run_bot(args):
-    config = Config().load(CONFIG_FILE_PATH)
-    _no_shifts_flag = False
-
-    if not args.api:
-        if args.login:
-            session = W2WSession(config.whentowork, debug=args.debug)
-            config.save(filename=CONFIG_FILE_PATH)
-            sys.exit(0)
-
-        shifts = {}
-        w2w = W2WSession(config.whentowork, debug=args.debug)
-        config.save(filename=CONFIG_FILE_PATH)
-
-        for filter in list(config["whentowork"]["filters"].items()):
-            shifts[filter[0]] = w2w.retrieve_schedule(
-                filter, date=args.date if args.date else "Today"
-            )
-    else:
-        from utils.w2w import Shift
-        url: str = config.rides_api.base_url
-        key: str = config.rides_api.key
-        supabase: SupabaseClient = create_client(url, key)
-        shifts = {}
-
-        for filter in list(config["whentowork"]["filters"].items()):
-            shifts[filter[0]] = supabase.schema("ops").table("schedule_shift").select("*").eq("local_date", args.date if args.date else datetime.datetime.now().strftime("%Y-%m-%d")).eq("position_id", filter[1]).execute().data
-
-            # Convert the shifts to Shift objects
-            shifts[filter[0]] = [Shift(
-                employee=normalize_name(shift["first_name"] + " " + shift["last_name"]),
-                start_time=shift["start_ts"],
-                end_time=shift["end_ts"],
-                total_hours=shift["duration_hours"],
-                description=shift["description"],
-                pos_id=shift["position_id"],
-            ) for shift in shifts[filter[0]]]
-
-    # if args.debug:
-    #     utils.cmdline.logger(
-    #         "Shifts JSON:\n\n" + json.dumps(shifts, indent=2, cls=NestedJSONEncoder),
-    #         level="debug",
-    #     )
-
-
-    filtered_shifts = {
-        "managers_on": [
-            shift
-            for shift in shifts["managers"] + shifts["assistants"]
-            if shift.is_manager_on
-        ],
-        "second_managers": [
-            shift
-            for shift in shifts["managers"] + shifts["assistants"]
-            if shift.is_second_manager
-        ],
-        "mods": [
-            shift for shift in shifts["managers"] + shifts["amo1"] + shifts["amo2"]
-            if shift.is_mod
-        ],
-        #"north_coords": [
-        #    shift
-        #    for shift in shifts["coords"] + shifts["assistants"] + shifts["managers"]
-        #    if shift.is_north_south_coord and shift.coord_area == "north"
-        #],
-        #"south_coords": [
-        #    shift
-        #    for shift in shifts["coords"] + shifts["assistants"] + shifts["managers"]
-        #    if shift.is_north_south_coord and shift.coord_area == "south"
-        #],
-        "amo1": shifts["amo1"],
-        "amo2": shifts["amo2"],
-    }
-    if args.debug:
-        utils.cmdline.logger(
-            "Filtered shifts:\n"
-            + json.dumps(filtered_shifts, indent=2, cls=NestedJSONEncoder),
-            level="debug",
-        )
-
-    # Build the operating day meta dict
-    operating_day_meta = shift_logic.build_operating_day_meta(filtered_shifts)
-
-    
-    if args.debug:
-        utils.cmdline.logger(
-            "Initial operating day meta:\n"
-            + json.dumps(operating_day_meta, indent=2, cls=NestedJSONEncoder),
-            level="debug",
-        )
-
-    # Build all the shift candidates
-    for meta_shift_id, meta_shift in operating_day_meta["shifts"].items():
-        # Build the manager on shifts
-        if args.debug:
-            utils.cmdline.logger(
-                f"Running {utils.cmdline.cmd_colors.OKCYAN}manager on{utils.cmdline.cmd_colors.ENDC} for meta shift {meta_shift_id}",
-                level="debug",
-            )
-        for shift in filtered_shifts["managers_on"]:
-            shift_scored = shift_logic.determine_shift(
-                operating_day_meta,
-                shift,
-                meta_shift["shift_times"]["start"],
-                meta_shift["shift_times"]["end"],
-                match_multiple=True,
-                shift_id=meta_shift_id,
-            )
-            if args.debug:
-                utils.cmdline.logger(
-                    utils.cmdline.colorize(
-                        f"{shift_scored[4].employee} score: {shift_scored[3]}",
-                        utils.cmdline.cmd_colors.ITALIC,
-                    ),
-                    level="debug",
-                )
-            meta_shift["managers_on"].append(
-                {
-                    "name": shift.employee,
-                    "score": shift_scored[3],
-                }
-            )
-
-        # If there are >2 shifts, we only need manager on for the 3rd shift
-        if meta_shift_id == 2:
-            continue
-
-        # Build the second manager shifts
-        if args.debug:
-            utils.cmdline.logger(
-                f"Running {utils.cmdline.cmd_colors.OKCYAN}second manager{utils.cmdline.cmd_colors.ENDC} for meta shift {meta_shift_id}",
-                level="debug",
-            )
-        for shift in filtered_shifts["second_managers"]:
-            shift_scored = shift_logic.determine_shift(
-                operating_day_meta,
-                shift,
-                meta_shift["shift_times"]["start"],
-                meta_shift["shift_times"]["end"],
-                match_multiple=True,
-                shift_id=meta_shift_id,
-            )
-            if args.debug:
-                utils.cmdline.logger(
-                    utils.cmdline.colorize(
-                        f"{shift_scored[4].employee} score: {shift_scored[3]}",
-                        utils.cmdline.cmd_colors.ITALIC,
-                    ),
-                    level="debug",
-                )
-            if shift_scored[3] <= -1000:
-                # If the score is less than -1000, it was disqualified
-                continue
-            meta_shift["second_managers"].append(
-                {
-                    "name": shift.employee,
-                    "score": shift_scored[3],
-                }
-            )
-        # Build the mod shifts
-        if args.debug:
-            utils.cmdline.logger(
-                f"Running {utils.cmdline.cmd_colors.OKCYAN}MOD{utils.cmdline.cmd_colors.ENDC} for meta shift {meta_shift_id}",
-                level="debug",
-            )
-        for shift in filtered_shifts["mods"]:
-            shift_scored = shift_logic.determine_shift(
-                operating_day_meta,
-                shift,
-                meta_shift["shift_times"]["start"],
-                meta_shift["shift_times"]["end"],
-                match_multiple=True,
-                shift_id=meta_shift_id,
-            )
-            if args.debug:
-                utils.cmdline.logger(
-                    utils.cmdline.colorize(
-                        f"{shift_scored[4].employee} score: {shift_scored[3]}",
-                        utils.cmdline.cmd_colors.ITALIC,
-                    ),
-                    level="debug",
-                )
-            if shift_scored[3] <= 0:
-                # If the score is negative, it was disqualified
-                continue
-            meta_shift["mods"].append(
-                {
-                    "name": shift.employee,
-                    "score": shift_scored[3],
-                }
-            )
-
-        # Build the north coord shifts
-        #if args.debug:
-        #    utils.cmdline.logger(
-        #        f"Running {utils.cmdline.cmd_colors.OKCYAN}north coord{utils.cmdline.cmd_colors.ENDC} for meta shift {meta_shift_id}",
-        #        level="debug",
-        #    )
-        #for shift in filtered_shifts["north_coords"]:
-        #    shift_scored = shift_logic.determine_shift(
-        #        operating_day_meta,
-        #        shift,
-        #        meta_shift["shift_times"]["start"],
-        #        meta_shift["shift_times"]["end"],
-        #        match_multiple=True,
-        #        shift_id=meta_shift_id,
-        #    )
-        #    if args.debug:
-        #        utils.cmdline.logger(
-        #            utils.cmdline.colorize(
-        #                f"{shift_scored[4].employee} score: {shift_scored[3]}",
-        #                utils.cmdline.cmd_colors.ITALIC,
-        #            ),
-        #            level="debug",
-        #        )
-        #    if shift_scored[3] <= -1000:
-        #        # If the score is less than -1000, it was disqualified
-        #        continue
-        #    meta_shift["north_coords"].append(
-        #        {
-        #            "name": shift.employee,
-        #            "score": shift_scored[3],
-        #        }
-        #    )
-
-        # Build the south coord shifts
-        #if args.debug:
-        #    utils.cmdline.logger(
-        #        f"Running {utils.cmdline.cmd_colors.OKCYAN}south coord{utils.cmdline.cmd_colors.ENDC} for meta shift {meta_shift_id}",
-        #        level="debug",
-        #    )
-        #for shift in filtered_shifts["south_coords"]:
-        #    shift_scored = shift_logic.determine_shift(
-        #        operating_day_meta,
-        #        shift,
-        #        meta_shift["shift_times"]["start"],
-        #        meta_shift["shift_times"]["end"],
-        #        match_multiple=True,
-        #        shift_id=meta_shift_id,
-        #    )
-        #    if args.debug:
-        #        utils.cmdline.logger(
-        #            utils.cmdline.colorize(
-        #                f"{shift_scored[4].employee} score: {shift_scored[3]}",
-        #                utils.cmdline.cmd_colors.ITALIC,
-        #            ),
-        #            level="debug",
-        #        )
-        #    if shift_scored[3] <= -1000:
-        #        # If the score is less than -1000, it was disqualified
-        #        continue
-        #    meta_shift["south_coords"].append(
-        #        {
-        #            "name": shift.employee,
-        #            "score": shift_scored[3],
-        #        }
-        #    )
-
-        # Add AMO1/AMO2 shifts without scoring; AMO1 is always assigned to the first shift, AMO2 to the second (shifts 0 and 1, respectively)
-        amo_key = "amo1" if meta_shift_id == 0 else "amo2" if meta_shift_id == 1 else None
-        if amo_key:
-            for shift in filtered_shifts[amo_key]:
-                area = (
-                    re.search(
-                        r'(\d{1}\/\d{1,2})',
-                        shift.description,
-                        re.BESTMATCH | re.IGNORECASE,
-                    ) # The description field contains the area for AMOs (i.e. 1/2, 3/4, 5/6, 7/8, 9/10)
-                )
-                meta_shift["amo"].append(
-                    {
-                        "name": shift.employee,
-                        "area": area.group(1) if area else None,
-                        "score": 0,
-                        "shift_obj": shift,
-                    }
-                )
-        if "amo" in meta_shift:
-            # Sort the AMO shifts by area (1/2, 3/4, 5/6, 7/8, 9/10)
-            meta_shift["amo"] = sorted(
-                meta_shift["amo"],
-                key=lambda x: int(x["area"].split("/")[0]) if "/" in x["area"] else 10,
-            )
-        if args.debug:
-            utils.cmdline.logger(
-                f"Built AMO shifts for meta shift {meta_shift_id}, found {len(meta_shift['amo'])} shifts\n" + json.dumps(meta_shift["amo"], indent=2, cls=NestedJSONEncoder),
-                level="debug",
-            )
-            utils.cmdline.logger(
-                f"Completed meta shift {meta_shift_id}:\n" + json.dumps(meta_shift, indent=2, cls=NestedJSONEncoder),
-                level="debug",
-            )
-
-    # If there are 2 shifts, the end time of the first shift should be the start time of the second shift
-    # TODO: make this easier to read
-    # 2026 update: find the real shift change time by looking at the AMO shifts; if the most common AMO1 end time and the most common AMO2 start time match, that is the shift change time.
-    # (only applies if there are 2 shifts and AMOs scheduled)
-    if len(operating_day_meta["shifts"]) >= 2:
-        #print(f"Operating day meta: {operating_day_meta}")
-        #operating_day_meta["shifts"][0]["shift_times"]["end"] = operating_day_meta[
-        #    "shifts"
-        #][1]["shift_times"]["start"]
-        if len(operating_day_meta["shifts"][0]["amo"]) > 0 and len(operating_day_meta["shifts"][1]["amo"]) > 0:
-            most_common_amo1_end = max(set([shift["shift_obj"].end_time for shift in operating_day_meta["shifts"][0]["amo"]]), key=[shift["shift_obj"].end_time for shift in operating_day_meta["shifts"][0]["amo"]].count)
-            most_common_amo2_start = max(set([shift["shift_obj"].start_time for shift in operating_day_meta["shifts"][1]["amo"]]), key=[shift["shift_obj"].start_time for shift in operating_day_meta["shifts"][1]["amo"]].count)
-            if most_common_amo1_end == most_common_amo2_start:
-                operating_day_meta["shifts"][0]["shift_times"]["end"] = operating_day_meta["assumed_first_shift_end"] = most_common_amo1_end
-                operating_day_meta["shifts"][1]["shift_times"]["start"] = operating_day_meta["assumed_second_shift_start"] = most_common_amo2_start
-        else: # If there are no AMOs scheduled, fall back to the old method of just matching the end time of the first shift to the start time of the second shift
-            operating_day_meta["shifts"][0]["shift_times"]["end"] = operating_day_meta[
-                "shifts"
-            ][1]["shift_times"]["start"]
-
-        # Constrain the 3rd shift to the end time of the 2nd shift if it exists
-        if len(operating_day_meta["shifts"]) == 3:
-            operating_day_meta["shifts"][2]["shift_times"]["start"] = operating_day_meta[
-                "shifts"
-            ][1]["shift_times"]["end"]
-
-    if args.debug:
-        utils.cmdline.logger(
-            "Operating day:\n"
-            + json.dumps(operating_day_meta, indent=2, cls=NestedJSONEncoder),
-            level="debug",
-        )
-
-    def build_message(shifts: dict) -> list:
-        prefixes = {
-            "manager_on": "Manager on: ",
-            "second_manager": "Second manager: ",
-            "mod": "MOD: ",
-            #"north": "North coord: ",
-            #"south": "South coord: ",
-            "amo1/2": "AMO 1/2: ",
-            "amo3/4": "AMO 3/4: ",
-            "amo5/6": "AMO 5/6: ",
-            "amo7/8": "AMO 7/8: ",
-            "amo9/10": "AMO 9/10: ",
-        }
-
-        if not len(shifts["shifts"]):
-            # No shifts detected, no need to continue
-            raise NoShiftsDetectedError
-
-        if args.date:
-            message_date = datetime.datetime.strptime(args.date, "%m/%d/%Y")
-        else:
-            message_date = datetime.datetime.now()
-
-        nowtime = datetime.datetime.now().time()
-        rand = random.randint(0, 25)
-        match nowtime:
-            case nowtime if nowtime.hour <= 11 and rand != 13:
-                friendly_time = "Good morning! 🌤️️🎢"
-            case nowtime if 12 <= nowtime.hour <= 17 and rand != 13:
-                friendly_time = "Good afternoon! ☀️🎢"
-            case nowtime if nowtime.hour >= 18 and rand != 13:
-                friendly_time = "Good evening! 🌙🎢"
-            case _:
-                friendly_time = "Hi there! 😀🎢"
-
-        outlist = [
-            friendly_time,
-            f"Management team for {message_date.strftime('%B %d, %Y')}",
-            "",
-        ]
-
-        for shift_id, shift in shifts["shifts"].items():
-            if shifts["detected_shifts"] >= 2:
-                time_fmts = ("%-I:%M%p", "%-I%p")
-
-                # Extract the start and end times of the shift and format them
-                start_time = shift["shift_times"]["start"].strftime(
-                    time_fmts[0]
-                    if shift["shift_times"]["start"].minute != 0
-                    else time_fmts[1]
-                )
-                end_time = shift["shift_times"]["end"].strftime(
-                    time_fmts[0]
-                    if shift["shift_times"]["end"].minute != 0
-                    else time_fmts[1]
-                )
-
-                # Prefix determination
-                prefix = "" if shift_id == 0 else "\n"
-
-                outlist.append(
-                    f"{prefix}From {start_time.lower()} to {end_time.lower()}:"
-                )
-
-                if shift_id == 0:
-                    amo = "amo1"
-                elif shift_id == 1:
-                    amo = "amo2"
-
-            if "managers_on" in shift and len(shift["managers_on"]) > 0:
-                outlist.append(
-                    prefixes["manager_on"]
-                    + max(shift["managers_on"], key=lambda s: s["score"])["name"]
-                    + ("*" if "duplicate" in shift and shift["duplicate"] else "")
-                )
-            if "second_managers" in shift and len(shift["second_managers"]) > 0:
-                outlist.append(
-                    prefixes["second_manager"]
-                    + max(shift["second_managers"], key=lambda s: s["score"])["name"]
-                )
-            if "mods" in shift and len(shift["mods"]) > 0:
-                outlist.append(
-                    prefixes["mod"]
-                    + max(shift["mods"], key=lambda s: s["score"])["name"]
-                )
-            #if "north_coords" in shift and len(shift["north_coords"]) > 0:
-            #    outlist.append(
-            #        prefixes["north"]
-            #        + max(shift["north_coords"], key=lambda s: s["score"])["name"]
-            #    )
-            #if "south_coords" in shift and len(shift["south_coords"]) > 0:
-            #    outlist.append(
-            #        prefixes["south"]
-            #        + max(shift["south_coords"], key=lambda s: s["score"])["name"]
-            #    )
-            
-            if "amo" in shift and len(shift["amo"]) > 0:
-                for amo_shift in shift["amo"]:
-                    outlist.append(
-                        prefixes[f"amo{amo_shift['area'].strip()}"]
-                        + amo_shift["name"]
-                    )
+# Computes (or reuses) the requested day and delivers it, or just composes it for request.output
+# Takes everything from the request, so any number of these can run at once
+def refresh(request: pipeline.RefreshRequest, config: Config | None = None) -> pipeline.RefreshResult:
+    config = config if config is not None else Config().load(CONFIG_FILE_PATH)
 
-        if "errors" in shifts and len(shifts["errors"]) > 0:
-            outlist.extend([""])
-            outlist.extend([f"*{error}" for error in shifts["errors"]])
+    _run_against_date = pipeline.resolve_date(request.date)
+    source = "api" if request.api else "w2w"
 
-        outlist.extend(
-            [
-                "",
-                f"Shifts updated at {nowtime.strftime('%H:%M')}",
-                'Reply "refresh" to update',
-            ]
+    def _compute_day() -> pipeline.ComputedDay:
+        return pipeline.compute_day(
+            config,
+            CONFIG_FILE_PATH,
+            date_arg=request.date,
+            api=request.api,
+            debug=request.debug,
         )
 
-        return outlist
-
-    try:
-        shift_msg = "\n".join(build_message(operating_day_meta))
-    except NoShiftsDetectedError:
-        if args.debug:
-            utils.cmdline.logger(
-                "No shifts detected, exiting",
-                level="debug",
-            )
-        _no_shifts_flag = True
-
-    if not _no_shifts_flag:
-        # The south message should remove lines beginning with "Second manager: " or "North coord: "
-        south_message = "\n".join(
-            [
-                line
-                for line in shift_msg.split("\n")
-                if not line.startswith("Second manager: ")
-                and not line.startswith("MOD: ")
-            ]
-        )
-
-        # The north message should remove lines beginning with "Second manager: " or "South coord: "
-        north_message = "\n".join(
-            [
-                line
-                for line in shift_msg.split("\n")
-                if not line.startswith("Second manager: ")
-                and not line.startswith("MOD: ")
-            ]
+    if request.debug:
+        # Debug runs always recompute so the debug output comes from a live computation
+        day = _compute_day()
+    else:
+        # A burst of "refresh" messages gets the cached day straight away while one
+        # background refresh brings it up to date
+        # Refreshes that do run are shared with the other front-ends' processes, so only
+        # one of them hits W2W or the API for a date at a time
+        cache_conf = config.get("cache") or {}
+        day = schedule_cache.get(
+            (_run_against_date.isoformat(), source),
+            lambda: singleflight.run(
+                f"day:{_run_against_date.isoformat()}:{source}",
+                _compute_day,
+                wait=cache_conf.get("singleflight_wait", singleflight.DEFAULT_WAIT),
+            ),
+            ttl=cache_conf.get("schedule_ttl", 60),
+            max_stale=cache_conf.get("schedule_max_stale", 900),
         )
 
-        # Set both groupme_a910_message and discord_message to south_message
-        groupme_a910_message = discord_message = south_message
-
-        # Set telegram_message to north_message
-        telegram_message = north_message
-
-        if hasattr(args, "return_discord_message") and args.return_discord_message:
-            # print("Returning discord message")
-            return discord_message
-
-        if hasattr(args, "return_telegram_message") and args.return_telegram_message:
-            # print("Returning telegram message")
-            return telegram_message
-
-    def _send_messages(messages: dict):
-        if args.groupme or args.gm_debug or args.groupme910 or args.groupme_north:
-            gm = GroupMe(
-                config.groupme,
-                debug=args.debug,
-                main_bot=args.groupme,
-                dev_bot=args.gm_debug,
-                a910_bot=args.groupme910,
-                north_bot=args.groupme_north,
-            )
-            _messages = {
-                "main": messages["shift_msg"],
-                "a910": messages["north_message"],
-                "north": messages["north_message"],
-            }
-            gm.post(args.message if args.message else _messages)
-        #if args.discord or args.discord_debug or False:  # Disable Discord posting for now
-        #    channel_id = (
-        #        config.discord.test_channel_id
-        #        if args.discord_debug
-        #        else config.discord.main_channel_id
-        #    )
-        #    ds = SingleMessageClient(
-        #        channel_id=channel_id, message=messages["discord_message"]
-        #    )
-        #    ds.run(config.discord.bot_token)
-        if args.telegram12 or args.telegram_debug:
-            tb = TelegramBot(config)
-            tb.send(
-                args.message if args.message else messages["telegram_message"],
-                (
-                    config.telegram.a12_chat_id
-                    if args.telegram12
-                    else config.telegram.test_chat_id
-                ),
-            )
-
-    def _print_messages_debug():
-        if args.debug:
-            utils.cmdline.logger(f"Message for GroupMe:\n{shift_msg}", level="debug")
-            #utils.cmdline.logger(
-            #    f"Message for Discord:\n{discord_message}", level="debug"
-            #)
+    messages = (
+        pipeline.compose(day.rendered, day.updated_at)
+        if day.rendered is not None
+        else None
+    )
 
     ####### EOS 2025 #######
     # TODO: Move this to something that pulls a special schedule from YAML and returns early
@@ -563,39 +62,72 @@ def run_bot(args):
     # Update 5/2026: Well that was optimistic...
 
     # Check if today is after EOS 2025 (November 9)
-    _run_against_date = datetime.datetime.now().date()
-    if args.date:
-        _run_against_date = datetime.datetime.strptime(args.date, "%m/%d/%Y").date()
-
     if _run_against_date == datetime.datetime(2025, 11, 10).date():
         message = "Thanks for a great season. See you in 2026! 🎢🎉"
-        _send_messages(
-            {
-                "shift_msg": message,
-                "groupme_a910_message": message,
-                "discord_message": message,
-                "north_message": message,
-                "telegram_message": message,
-            }
-        )
-        if args.debug:
+        messages = {
+            "shift_msg": message,
+            "groupme_a910_message": message,
+            "discord_message": message,
+            "north_message": message,
+            "telegram_message": message,
+        }
+        day = None
+        if request.debug:
             utils.cmdline.logger(f"Special message:\n{message}", level="debug")
-        return
 
     # Check if today is after EOS 2025 (November 9)
     #elif _run_against_date > datetime.datetime(2025, 11, 10).date():
     #    return
 
-    if not _no_shifts_flag:
-        _send_messages(
-            {
-                "shift_msg": shift_msg,
-                "groupme_a910_message": groupme_a910_message,
-                "north_message": north_message,
-                "telegram_message": telegram_message,
-            }
-        )
-        _print_messages_debug()
+    deliveries = {}
+    if messages is not None and request.output is None:
+        deliveries = pipeline.deliver(messages, config, request)
+        if request.debug and day is not None:
+            utils.cmdline.logger(
+                f"Message for GroupMe:\n{messages['shift_msg']}", level="debug"
+            )
+            #utils.cmdline.logger(
+            #    f"Message for Discord:\n{messages['discord_message']}", level="debug"
+            #)
+
+    return pipeline.RefreshResult(
+        request=request,
+        date=_run_against_date,
+        day=day,
+        messages=messages,
+        deliveries=deliveries,
+    )
+
+
+# Command line (and callback server) entry point; returns the composed message in the
+# return_*_message output modes
+def run_bot(args):
+    config = Config().load(CONFIG_FILE_PATH)
+
+    if not args.api and args.login:
+        session = W2WSession(config.whentowork, debug=args.debug)
+        config.save(filename=CONFIG_FILE_PATH)
+        sys.exit(0)
+
+    # A range (-D start..end) computes every day at once and prints each one as it's done
+    dates = pipeline.resolve_date_range(args.date)
+    if dates is not None:
+        return run_range(args, config, dates)
+
+    return refresh(pipeline.RefreshRequest.from_args(args), config).reply
+
+
+# Range mode only prints (every computed day also lands in the snapshot store), nothing is delivered
+def run_range(args, config: Config, dates: list) -> None:
+    days = pipeline.compute_range(
+        config, CONFIG_FILE_PATH, dates, api=args.api, debug=args.debug
+    )
+    for day in days:
+        if day.rendered is None:
+            print(f"No shifts detected for {day.date.strftime('%m/%d/%Y')}\n", flush=True)
+            continue
+        messages = pipeline.compose(day.rendered, day.updated_at)
+        print(messages["shift_msg"] + "\n", flush=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,186 @@
+import contextlib, datetime, difflib, io, itertools, json, os, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import utils
+import utils.cmdline
+import utils.scoring as scoring
+from utils.config import Config
+from utils.w2w import Shift
+from rides_bot.app import CONFIG_FILE_PATH
+import rides_bot.pipeline as pipeline
+
+# Replays recorded days through classify/assign/render and diffs the management team lines
+# against the output stored with each day
+#
+#   python -m rides_bot.backtest -r 05/30/2026    record a day from W2W (-a for the API)
+#   python -m rides_bot.backtest                  replay every recorded day
+#   python -m rides_bot.backtest -u               accept the current output as expected
+#
+# Each day is a JSON file: date, source, the raw shift rows per filter, and the expected result
+
+DEFAULT_DAYS_PATH = (Path(__file__).parent.parent / "state" / "backtest").resolve()
+
+backtest_args = {
+    "path": {
+        "flag": "p",
+        "help": f"Directory of recorded days (default {DEFAULT_DAYS_PATH})",
+        "kwargs": {
+            "default": DEFAULT_DAYS_PATH,
+            "type": Path,
+        },
+    },
+    "record": {
+        "flag": "r",
+        "help": "Record a day (MM/DD/YYYY), can be repeated",
+        "kwargs": {
+            "action": "append",
+        },
+    },
+    "update": {
+        "flag": "u",
+        "help": "Store the current output as the expected output",
+        "kwargs": {
+            "action": "store_true",
+        },
+    },
+    "workers": {
+        "flag": "w",
+        "help": "Worker processes (default: one per CPU)",
+        "kwargs": {
+            "type": int,
+        },
+    },
+    "api": utils.cmdline.default_args["api"],
+    "debug": utils.cmdline.default_args["debug"],
+}
+
+
+def day_path(path: Path, date: datetime.date, source: str) -> Path:
+    return path / f"{date.isoformat()}-{source}.json"
+
+
+# Run one recorded day through the pipeline; top level so the process pool can pickle it
+def replay(day: dict, rules: scoring.ScoringRules) -> dict:
+    shifts = {
+        label: [Shift(*row) for row in rows] for label, rows in day["shifts"].items()
+    }
+    fetched = pipeline.FetchedDay(
+        date=datetime.date.fromisoformat(day["date"]),
+        source=day["source"],
+        shifts=shifts,
+        fetched_at=datetime.datetime.now(),
+    )
+
+    # shift_logic logs every manager on it identifies
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            classified = pipeline.classify(fetched)
+            assigned = pipeline.assign(classified, rules)
+            return {"lines": pipeline.render(assigned).lines}
+        except pipeline.NoShiftsDetectedError:
+            return {"lines": []}
+        except Exception as e:
+            return {"error": repr(e)}
+
+
+# Rendered lines can carry their own line breaks (the blank line before each shift)
+def _lines(result: dict) -> list[str]:
+    if "error" in result:
+        return [f"error: {result['error']}"]
+    return "\n".join(result["lines"]).split("\n")
+
+
+def record(args, config: Config, rules: scoring.ScoringRules) -> None:
+    args.path.mkdir(parents=True, exist_ok=True)
+    for date_arg in args.record:
+        fetched = pipeline.fetch(
+            config, CONFIG_FILE_PATH, date_arg=date_arg, api=args.api, debug=args.debug
+        )
+        day = {
+            "date": fetched.date.isoformat(),
+            "source": fetched.source,
+            "shifts": {
+                label: [pipeline.shift_row(shift) for shift in shifts]
+                for label, shifts in fetched.shifts.items()
+            },
+        }
+        day["expected"] = replay(day, rules)
+
+        filename = day_path(args.path, fetched.date, fetched.source)
+        filename.write_text(json.dumps(day, indent=2, default=str))
+        utils.cmdline.logger(f"Recorded {filename}")
+
+
+def backtest(args, rules: scoring.ScoringRules) -> int:
+    filenames = sorted(args.path.glob("*.json"))
+    if not filenames:
+        utils.cmdline.logger(f"No recorded days in {args.path}")
+        return 0
+    days = [json.loads(filename.read_text()) for filename in filenames]
+
+    started = time.perf_counter()
+    workers = args.workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(
+            pool.map(
+                replay,
+                days,
+                itertools.repeat(rules),
+                chunksize=max(1, len(days) // (workers * 4)),
+            )
+        )
+    elapsed = time.perf_counter() - started
+
+    counts = {"unchanged": 0, "changed": 0, "new": 0}
+    for filename, day, result in zip(filenames, days, results):
+        expected = day.get("expected")
+        if expected == result:
+            counts["unchanged"] += 1
+            continue
+
+        status = "new" if expected is None else "changed"
+        counts[status] += 1
+        utils.cmdline.logger(f"{day['date']} {day['source']}: {status}")
+        if expected is not None:
+            print(
+                "\n".join(
+                    difflib.unified_diff(
+                        _lines(expected),
+                        _lines(result),
+                        fromfile="expected",
+                        tofile="current",
+                        lineterm="",
+                    )
+                )
+            )
+
+        if args.update:
+            day["expected"] = result
+            filename.write_text(json.dumps(day, indent=2, default=str))
+
+    utils.cmdline.logger(
+        f"Backtested {len(days)} days in {elapsed:.2f}s on {workers} workers: "
+        + ", ".join(f"{count} {status}" for status, count in counts.items())
+        + (" (expected output updated)" if args.update else "")
+    )
+    return 1 if counts["changed"] and not args.update else 0
+
+
+def main(args) -> int:
+    # Scoring overrides in config.yaml apply to the backtest too
+    config = (
+        Config().load(CONFIG_FILE_PATH)
+        if args.record or CONFIG_FILE_PATH.exists()
+        else None
+    )
+    rules = scoring.load_rules(config)
+
+    if args.record:
+        record(args, config, rules)
+        return 0
+    return backtest(args, rules)
+
+
+if __name__ == "__main__":
+    sys.exit(main(utils.cmdline.get_args(backtest_args)))
@@ -2,10 +2,20 @@ import re
 from flask import Flask, Response, request, redirect
 
 from utils.config import Config
-from .app import run_bot, CONFIG_FILE_PATH
+from utils.jobs import JobQueue
+from .app import refresh, CONFIG_FILE_PATH
+from .pipeline import RefreshRequest
 
 config = Config().load(CONFIG_FILE_PATH)
 
+# Refreshes run on these workers after the callback has been answered
+_queue_conf = config.get("callback_server") or {}
+refresh_jobs = JobQueue(
+    workers=_queue_conf.get("workers", 2),
+    max_queued=_queue_conf.get("max_queued", 16),
+    name="groupme",
+)
+
 
 class RuntimeArgs(object):
 
@@ -18,6 +28,15 @@ class RuntimeArgs(object):
 app = Flask(__name__)
 
 
+# GroupMe only waits a few seconds for the callback, so the refresh itself happens on refresh_jobs
+# Identical requests (same group, same date) still waiting in the queue are coalesced into one
+# When the queue is full the callback gets a 503 instead of waiting for room
+def _enqueue(refresh_request: RefreshRequest) -> Response:
+    if not refresh_jobs.submit(refresh_request, refresh, refresh_request):
+        return Response(status=503)
+    return Response(status=200)
+
+
 # GET route /l/<string> for testing
 @app.route("/l/<string>")
 def linktest(string):
@@ -46,7 +65,10 @@ def redirecttest(string):
 @app.post("/update/a910", endpoint="a910")
 @app.post("/update/north", endpoint="north")
 def groupme():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("text"), str):
+        return Response(status=400)
+
     args = RuntimeArgs(config.gunicorn.rides_bot_args)
 
     # Quick and dirty handling of where the bot posts
@@ -68,8 +90,7 @@ def groupme():
     message = data.__getitem__("text").lower().strip()
 
     if message == "refresh":
-        run_bot(args)
-        return Response(status=200)
+        return _enqueue(RefreshRequest.from_args(args))
     
     if message == "debug":
         import json
@@ -80,8 +101,7 @@ def groupme():
 
     elif re.match(date_pattern, message):
         args.date = re.search(date_pattern, message).group(1)
-        run_bot(args)
-        return Response(status=200)
+        return _enqueue(RefreshRequest.from_args(args))
     else:
         # Append to the failure log file
         with open("failure_log.txt", "a") as f:
@@ -7,7 +7,9 @@ sys.path.append("..")
 from threading import Event
 
 from utils.config import Config
-from rides_bot.app import run_bot, CONFIG_FILE_PATH
+from utils.offload import BlockingRunner, concurrency_limit
+from rides_bot.app import refresh, CONFIG_FILE_PATH
+from rides_bot.pipeline import RefreshRequest
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -21,24 +23,13 @@ def handle_sigterm(*args, **kwargs):
     raise KeyboardInterrupt
 
 
-class Args:
-    def __init__(self):
-        self.return_discord_message = True
-        self.debug = False
-        self.gm_debug = False
-        self.login = False
-        self.groupme = False
-        self.discord = False
-        self.discord_debug = False
-        self.date = None
-        self.message = ""
-
-
 class DiscordListener(discord.Client):
     def __init__(self):
         self._conf = Config().load(CONFIG_FILE_PATH)
         self.token = self._conf.discord.bot_token
-        self.args = Args()
+        self.runner = BlockingRunner(concurrency_limit(self._conf), name="discord")
+        # Same source as the other front-ends unless the config says otherwise
+        self.use_api = (self._conf.get("listeners") or {}).get("api", True)
 
         super().__init__(intents=intents)
 
@@ -59,19 +50,24 @@ class DiscordListener(discord.Client):
 
         if message.content.lower().strip() == "refresh":
             if message.channel.id == self._conf.discord.test_channel_id:
-                args = self.args
-                args.discord_debug = True
-                await self.send_message(run_bot(args), message.channel.id)
-
+                request = RefreshRequest(
+                    api=self.use_api, output="discord", targets={"discord_debug"}
+                )
             elif message.channel.id == self._conf.discord.main_channel_id:
-                args = self.args
-                args.discord = True
-                await self.send_message(run_bot(args), message.channel.id)
+                request = RefreshRequest(
+                    api=self.use_api, output="discord", targets={"discord"}
+                )
+            else:
+                return
+
+            result = await self.runner.run(refresh, request)
+            await self.send_message(result.reply, message.channel.id)
 
         if message.content.lower().strip() == "ping":
             print("Pong!")
 
     async def close(self) -> None:
+        self.runner.shutdown()
         return await super().close()
 
 
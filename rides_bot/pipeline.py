@@ -0,0 +1,1067 @@
+import collections, copy, datetime, hashlib, json, random, threading, time, regex as re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import utils
+import utils.shift_logic as shift_logic
+import utils.scoring as scoring
+import utils.assignment as assignment
+import utils.descriptions as descriptions
+import utils.delivery as delivery
+from utils.snapshots import snapshot_store
+from utils.nested_json import NestedJSONEncoder
+from utils.config import Config
+from utils.w2w import W2WSession, week_of
+from utils.rides_api import RidesAPI
+from utils.groupme import GroupMe
+from utils.telegram import TelegramBot
+
+
+class NoShiftsDetectedError(Exception):
+    pass
+
+
+# Output of each stage; key identifies the source data the stage ran on (None = not cacheable)
+@dataclass(frozen=True)
+class FetchedDay:
+    date: datetime.date
+    source: str  # "api" or "w2w"
+    shifts: dict  # filter label -> list[Shift]
+    fetched_at: datetime.datetime
+    key: str | None = None
+
+
+@dataclass(frozen=True)
+class ClassifiedDay:
+    date: datetime.date
+    filtered_shifts: dict  # role -> list[Shift]
+    key: str | None = None
+
+
+@dataclass(frozen=True)
+class AssignedDay:
+    date: datetime.date
+    operating_day_meta: dict
+    key: str | None = None
+
+
+@dataclass(frozen=True)
+class RenderedDay:
+    date: datetime.date
+    lines: list  # management team lines, without the greeting and footer
+    key: str | None = None
+
+
+# Everything a refresh needs from one run of the pipeline; rendered is None when no shifts were found
+@dataclass(frozen=True)
+class ComputedDay:
+    date: datetime.date
+    source: str
+    updated_at: datetime.datetime
+    operating_day_meta: dict
+    rendered: RenderedDay | None
+
+
+# Where a refresh can be delivered to; same names as the command line flags
+TARGETS = (
+    "groupme",
+    "gm_debug",
+    "groupme910",
+    "groupme_north",
+    "discord",
+    "discord_debug",
+    "telegram12",
+    "telegram_debug",
+)
+
+# Messages a refresh can return instead of delivering (compose() key per output mode)
+OUTPUTS = {
+    "discord": "discord_message",
+    "telegram": "telegram_message",
+}
+
+
+# One refresh, independent of whichever front-end asked for it
+# output set: compose and return that message without delivering anything
+@dataclass(frozen=True)
+class RefreshRequest:
+    date: str | None = None  # MM/DD/YYYY, None for today
+    api: bool = False
+    debug: bool = False
+    targets: frozenset = frozenset()  # subset of TARGETS
+    output: str | None = None  # key of OUTPUTS
+    message: str = ""  # sent to the targets instead of the schedule
+
+    def __post_init__(self):
+        unknown = set(self.targets) - set(TARGETS)
+        if unknown:
+            raise ValueError(f"Unknown refresh targets: {', '.join(sorted(unknown))}")
+        if self.output is not None and self.output not in OUTPUTS:
+            raise ValueError(f"Unknown refresh output: {self.output}")
+        object.__setattr__(self, "targets", frozenset(self.targets))
+
+    # From an argparse namespace (or anything with the same attributes)
+    @classmethod
+    def from_args(cls, args) -> "RefreshRequest":
+        output = None
+        if getattr(args, "return_discord_message", False):
+            output = "discord"
+        elif getattr(args, "return_telegram_message", False):
+            output = "telegram"
+        return cls(
+            date=getattr(args, "date", None),
+            api=bool(getattr(args, "api", False)),
+            debug=bool(getattr(args, "debug", False)),
+            targets=frozenset(t for t in TARGETS if getattr(args, t, False)),
+            output=output,
+            message=getattr(args, "message", None) or "",
+        )
+
+
+# What a refresh did; messages is None when no shifts were found
+@dataclass(frozen=True)
+class RefreshResult:
+    request: RefreshRequest
+    date: datetime.date
+    day: ComputedDay | None  # None for special days that skip the schedule
+    messages: dict | None
+    deliveries: dict = field(default_factory=dict)  # target -> utils.delivery.Delivery
+
+    # Targets that accepted the messages
+    @property
+    def delivered(self) -> frozenset:
+        return frozenset(t for t, result in self.deliveries.items() if result.ok)
+
+    # The message for the request's output mode
+    @property
+    def reply(self) -> str | None:
+        if self.request.output is None or self.messages is None:
+            return None
+        return self.messages[OUTPUTS[self.request.output]]
+
+
+# Small thread-safe LRU for stage outputs
+class StageCache:
+
+    def __init__(self, maxsize: int = 64):
+        self._maxsize = maxsize
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+
+stage_cache = StageCache()
+
+# Seconds each stage took the last time it actually ran
+stage_timings: dict = {}
+
+# Bump this whenever classify/assign/render change what they produce for the same shifts
+PIPELINE_VERSION = 4
+
+# How often a fetched day matched the last computed digest ("hit") or had to be scored ("miss"),
+# and how often a past day was answered from its snapshot without fetching ("snapshot")
+digest_stats = collections.Counter()
+
+
+# A shift as it came from the source, in Shift's argument order (Shift(*row) rebuilds it)
+def shift_row(shift) -> list:
+    return [
+        str(shift.employee),
+        shift._start_time_str,
+        shift._end_time_str,
+        shift._total_hours_str,
+        shift.description,
+        shift.pos_id,
+    ]
+
+
+# Stable digest of the raw shift rows for a day, in the order the source returned them
+# (order matters: ties and AMO listings follow it)
+def shifts_digest(
+    date: datetime.date, source: str, shifts: dict, rules: scoring.ScoringRules
+) -> str:
+    rows = {
+        label: [[str(value) for value in shift_row(shift)] for shift in label_shifts]
+        for label, label_shifts in shifts.items()
+    }
+    payload = json.dumps(
+        [
+            PIPELINE_VERSION,
+            descriptions.CACHE_VERSION,
+            rules.fingerprint,
+            date.isoformat(),
+            source,
+            rows,
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# Everything that decides what a day computes to besides its shifts; snapshots computed
+# under a different version are never served for past dates
+def result_version(config: Config) -> str:
+    return (
+        f"{PIPELINE_VERSION}:{descriptions.CACHE_VERSION}:"
+        f"{scoring.load_rules(config).fingerprint}"
+    )
+
+
+# Run a stage on the previous stage's output, timing it and reusing the cached output when
+# the upstream key has been seen before
+# Debug runs always run the stage so its debug output (e.g. the scoring) shows up; the fresh
+# output still replaces the cached one
+def run_stage(name: str, func, upstream, *args, debug: bool = False):
+    cache_key = f"{name}:{upstream.key}" if upstream.key is not None else None
+    if cache_key is not None and not debug:
+        cached = stage_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    started = time.perf_counter()
+    result = func(upstream, *args, debug=debug)
+    stage_timings[name] = time.perf_counter() - started
+
+    if debug:
+        utils.cmdline.logger(
+            f"Stage {name}: {stage_timings[name] * 1000:.1f}ms", level="debug"
+        )
+    if cache_key is not None:
+        stage_cache.put(cache_key, result)
+    return result
+
+
+# Parse the --date argument (MM/DD/YYYY), defaulting to today
+def resolve_date(date_arg: str | None) -> datetime.date:
+    if date_arg:
+        return datetime.datetime.strptime(date_arg, "%m/%d/%Y").date()
+    return datetime.datetime.now().date()
+
+
+# Every day in a --date range (MM/DD/YYYY..MM/DD/YYYY), or None if date_arg isn't a range
+def resolve_date_range(date_arg: str | None) -> list[datetime.date] | None:
+    if not date_arg or ".." not in date_arg:
+        return None
+    start, end = (resolve_date(part.strip()) for part in date_arg.split("..", 1))
+    if end < start:
+        raise ValueError(f"Date range ends before it starts: {date_arg}")
+    return [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+### Stage 1: pull the day's shifts for every filter from W2W or the Rides API
+def fetch(
+    config: Config,
+    config_path: Path,
+    date_arg: str | None = None,
+    api: bool = False,
+    debug: bool = False,
+    session: W2WSession | RidesAPI | None = None,
+) -> FetchedDay:
+    # session lets a batch of days share one W2W login or API client
+    started = time.perf_counter()
+
+    if not api:
+        w2w = session
+        if w2w is None:
+            w2w = W2WSession(config.whentowork, debug=debug)
+            config.save(filename=config_path)
+
+        # All filters are fetched concurrently, so a refresh takes as long as the slowest one
+        shifts = w2w.retrieve_schedules(
+            list(config["whentowork"]["filters"].items()),
+            date=date_arg if date_arg else "Today",
+        )
+    else:
+        rides_api = session or RidesAPI(config.rides_api, debug=debug)
+
+        # One request for every position, partitioned by filter
+        shifts = rides_api.retrieve_schedules(
+            list(config["whentowork"]["filters"].items()),
+            date=date_arg if date_arg else datetime.datetime.now().strftime("%Y-%m-%d"),
+        )
+
+    stage_timings["fetch"] = time.perf_counter() - started
+    if debug:
+        utils.cmdline.logger(
+            f"Stage fetch: {stage_timings['fetch'] * 1000:.1f}ms", level="debug"
+        )
+        # utils.cmdline.logger(
+        #     "Shifts JSON:\n\n" + json.dumps(shifts, indent=2, cls=NestedJSONEncoder),
+        #     level="debug",
+        # )
+
+    return fetched_day(config, resolve_date(date_arg), "api" if api else "w2w", shifts)
+
+
+def fetched_day(
+    config: Config, date: datetime.date, source: str, shifts: dict
+) -> FetchedDay:
+    return FetchedDay(
+        date=date,
+        source=source,
+        shifts=shifts,
+        fetched_at=datetime.datetime.now(),
+        # Scoring rules are part of the key, so retuned weights rescore the day
+        key=shifts_digest(date, source, shifts, scoring.load_rules(config)),
+    )
+
+
+### Stage 2: sort the shifts into the roles we're looking for
+def classify(fetched: FetchedDay, debug: bool = False) -> ClassifiedDay:
+    shifts = fetched.shifts
+
+    filtered_shifts = {
+        "managers_on": [
+            shift
+            for shift in shifts["managers"] + shifts["assistants"]
+            if shift.is_manager_on
+        ],
+        "second_managers": [
+            shift
+            for shift in shifts["managers"] + shifts["assistants"]
+            if shift.is_second_manager
+        ],
+        "mods": [
+            shift for shift in shifts["managers"] + shifts["amo1"] + shifts["amo2"]
+            if shift.is_mod
+        ],
+        #"north_coords": [
+        #    shift
+        #    for shift in shifts["coords"] + shifts["assistants"] + shifts["managers"]
+        #    if shift.is_north_south_coord and shift.coord_area == "north"
+        #],
+        #"south_coords": [
+        #    shift
+        #    for shift in shifts["coords"] + shifts["assistants"] + shifts["managers"]
+        #    if shift.is_north_south_coord and shift.coord_area == "south"
+        #],
+        "amo1": shifts["amo1"],
+        "amo2": shifts["amo2"],
+    }
+    if debug:
+        utils.cmdline.logger(
+            "Filtered shifts:\n"
+            + json.dumps(filtered_shifts, indent=2, cls=NestedJSONEncoder),
+            level="debug",
+        )
+        utils.cmdline.logger(
+            f"Description matches: {dict(descriptions.match_stats)}",
+            level="debug",
+        )
+
+
+    return ClassifiedDay(date=fetched.date, filtered_shifts=filtered_shifts, key=fetched.key)
+
+
+# A scored candidate for a role in a meta shift; "1st shift"/"2nd shift" in the description
+# pins them to that meta shift when roles are assigned
+def _candidate(shift, score: int) -> dict:
+    candidate = {"name": shift.employee, "score": score}
+    if shift.description_class.is_specified_shift:
+        candidate["specified_shift"] = shift.description_class.specified_shift
+    return candidate
+
+
+### Stage 3: work out the meta shifts and score every candidate for every role
+def assign(
+    classified: ClassifiedDay, rules: scoring.ScoringRules, debug: bool = False
+) -> AssignedDay:
+    # shift_logic adjusts role times on the shifts in place, so work on a copy and keep the
+    # classified (and possibly cached) shifts untouched
+    filtered_shifts = copy.deepcopy(classified.filtered_shifts)
+
+    # Build the operating day meta dict
+    operating_day_meta = shift_logic.build_operating_day_meta(filtered_shifts)
+
+    
+    if debug:
+        utils.cmdline.logger(
+            "Initial operating day meta:\n"
+            + json.dumps(operating_day_meta, indent=2, cls=NestedJSONEncoder),
+            level="debug",
+        )
+
+    # Score every candidate against every meta shift up front, one matrix per role
+    windows = [
+        (
+            meta_shift_id,
+            meta_shift["shift_times"]["start"],
+            meta_shift["shift_times"]["end"],
+        )
+        for meta_shift_id, meta_shift in operating_day_meta["shifts"].items()
+    ]
+    scores = {
+        role: scoring.score_matrix(
+            operating_day_meta, filtered_shifts[role], windows, rules
+        ).tolist()
+        for role in ("managers_on", "second_managers", "mods")
+    }
+
+    # Build all the shift candidates
+    for window, (meta_shift_id, meta_shift) in enumerate(
+        operating_day_meta["shifts"].items()
+    ):
+        # Build the manager on shifts
+        if debug:
+            utils.cmdline.logger(
+                f"Running {utils.cmdline.cmd_colors.OKCYAN}manager on{utils.cmdline.cmd_colors.ENDC} for meta shift {meta_shift_id}",
+                level="debug",
+            )
+        for candidate, shift in enumerate(filtered_shifts["managers_on"]):
+            shift_score = scores["managers_on"][window][candidate]
+            if debug:
+                utils.cmdline.logger(
+                    utils.cmdline.colorize(
+                        f"{shift.employee} score: {shift_score}",
+                        utils.cmdline.cmd_colors.ITALIC,
+                    ),
+                    level="debug",
+                )
+            meta_shift["managers_on"].append(_candidate(shift, shift_score))
+
+        # If there are >2 shifts, we only need manager on for the 3rd shift
+        if meta_shift_id == 2:
+            continue
+
+        # Build the second manager shifts
+        if debug:
+            utils.cmdline.logger(
+                f"Running {utils.cmdline.cmd_colors.OKCYAN}second manager{utils.cmdline.cmd_colors.ENDC} for meta shift {meta_shift_id}",
+                level="debug",
+            )
+        for candidate, shift in enumerate(filtered_shifts["second_managers"]):
+            shift_score = scores["second_managers"][window][candidate]
+            if debug:
+                utils.cmdline.logger(
+                    utils.cmdline.colorize(
+                        f"{shift.employee} score: {shift_score}",
+                        utils.cmdline.cmd_colors.ITALIC,
+                    ),
+                    level="debug",
+                )
+            if shift_score <= -1000:
+                # If the score is less than -1000, it was disqualified
+                continue
+            meta_shift["second_managers"].append(_candidate(shift, shift_score))
+        # Build the mod shifts
+        if debug:
+            utils.cmdline.logger(
+                f"Running {utils.cmdline.cmd_colors.OKCYAN}MOD{utils.cmdline.cmd_colors.ENDC} for meta shift {meta_shift_id}",
+                level="debug",
+            )
+        for candidate, shift in enumerate(filtered_shifts["mods"]):
+            shift_score = scores["mods"][window][candidate]
+            if debug:
+                utils.cmdline.logger(
+                    utils.cmdline.colorize(
+                        f"{shift.employee} score: {shift_score}",
+                        utils.cmdline.cmd_colors.ITALIC,
+                    ),
+                    level="debug",
+                )
+            if shift_score <= 0:
+                # If the score is negative, it was disqualified
+                continue
+            meta_shift["mods"].append(_candidate(shift, shift_score))
+
+        # Build the north coord shifts
+        #if debug:
+        #    utils.cmdline.logger(
+        #        f"Running {utils.cmdline.cmd_colors.OKCYAN}north coord{utils.cmdline.cmd_colors.ENDC} for meta shift {meta_shift_id}",
+        #        level="debug",
+        #    )
+        #for shift in filtered_shifts["north_coords"]:
+        #    shift_scored = shift_logic.determine_shift(
+        #        operating_day_meta,
+        #        shift,
+        #        meta_shift["shift_times"]["start"],
+        #        meta_shift["shift_times"]["end"],
+        #        match_multiple=True,
+        #        shift_id=meta_shift_id,
+        #    )
+        #    if debug:
+        #        utils.cmdline.logger(
+        #            utils.cmdline.colorize(
+        #                f"{shift_scored[4].employee} score: {shift_scored[3]}",
+        #                utils.cmdline.cmd_colors.ITALIC,
+        #            ),
+        #            level="debug",
+        #        )
+        #    if shift_scored[3] <= -1000:
+        #        # If the score is less than -1000, it was disqualified
+        #        continue
+        #    meta_shift["north_coords"].append(
+        #        {
+        #            "name": shift.employee,
+        #            "score": shift_scored[3],
+        #        }
+        #    )
+
+        # Build the south coord shifts
+        #if debug:
+        #    utils.cmdline.logger(
+        #        f"Running {utils.cmdline.cmd_colors.OKCYAN}south coord{utils.cmdline.cmd_colors.ENDC} for meta shift {meta_shift_id}",
+        #        level="debug",
+        #    )
+        #for shift in filtered_shifts["south_coords"]:
+        #    shift_scored = shift_logic.determine_shift(
+        #        operating_day_meta,
+        #        shift,
+        #        meta_shift["shift_times"]["start"],
+        #        meta_shift["shift_times"]["end"],
+        #        match_multiple=True,
+        #        shift_id=meta_shift_id,
+        #    )
+        #    if debug:
+        #        utils.cmdline.logger(
+        #            utils.cmdline.colorize(
+        #                f"{shift_scored[4].employee} score: {shift_scored[3]}",
+        #                utils.cmdline.cmd_colors.ITALIC,
+        #            ),
+        #            level="debug",
+        #        )
+        #    if shift_scored[3] <= -1000:
+        #        # If the score is less than -1000, it was disqualified
+        #        continue
+        #    meta_shift["south_coords"].append(
+        #        {
+        #            "name": shift.employee,
+        #            "score": shift_scored[3],
+        #        }
+        #    )
+
+        # Add AMO1/AMO2 shifts without scoring; AMO1 is always assigned to the first shift, AMO2 to the second (shifts 0 and 1, respectively)
+        amo_key = "amo1" if meta_shift_id == 0 else "amo2" if meta_shift_id == 1 else None
+        if amo_key:
+            for shift in filtered_shifts[amo_key]:
+                area = (
+                    re.search(
+                        r'(\d{1}\/\d{1,2})',
+                        shift.description,
+                        re.BESTMATCH | re.IGNORECASE,
+                    ) # The description field contains the area for AMOs (i.e. 1/2, 3/4, 5/6, 7/8, 9/10)
+                )
+                meta_shift["amo"].append(
+                    {
+                        "name": shift.employee,
+                        "area": area.group(1) if area else None,
+                        "score": 0,
+                        "shift_obj": shift,
+                    }
+                )
+        if "amo" in meta_shift:
+            # Sort the AMO shifts by area (1/2, 3/4, 5/6, 7/8, 9/10)
+            meta_shift["amo"] = sorted(
+                meta_shift["amo"],
+                key=lambda x: int(x["area"].split("/")[0]) if "/" in x["area"] else 10,
+            )
+        if debug:
+            utils.cmdline.logger(
+                f"Built AMO shifts for meta shift {meta_shift_id}, found {len(meta_shift['amo'])} shifts\n" + json.dumps(meta_shift["amo"], indent=2, cls=NestedJSONEncoder),
+                level="debug",
+            )
+            utils.cmdline.logger(
+                f"Completed meta shift {meta_shift_id}:\n" + json.dumps(meta_shift, indent=2, cls=NestedJSONEncoder),
+                level="debug",
+            )
+
+    # Pick each role's slots at once so the same person can't win that role in both shifts
+    # (unless they're working a double, or have more than one shift that day)
+    shifts_by_name = collections.defaultdict(set)
+    for role in assignment.ROLES:
+        for shift in filtered_shifts[role]:
+            shifts_by_name[shift.employee].add(
+                (shift.start_time, shift.end_time, shift.is_double_shift)
+            )
+    doubles = {
+        name
+        for name, worked in shifts_by_name.items()
+        if len(worked) > 1 or any(is_double for _, _, is_double in worked)
+    }
+    started = time.perf_counter()
+    assigned_roles = assignment.assign_roles(operating_day_meta, doubles)
+    for (meta_shift_id, role), assigned in assigned_roles.items():
+        meta_shift = operating_day_meta["shifts"][meta_shift_id]
+        meta_shift.setdefault("assigned", {})[role] = assigned.name
+        if assigned.duplicate:
+            meta_shift["duplicate"] = True
+    if any(assigned.duplicate for assigned in assigned_roles.values()):
+        operating_day_meta["errors"].append(
+            "Multiple managers scheduled for this shift. Result may be inaccurate."
+        )
+    if debug:
+        utils.cmdline.logger(
+            f"Assigned roles in {(time.perf_counter() - started) * 1000:.2f}ms:\n"
+            + "\n".join(
+                f"{meta_shift_id} {role}: {assigned.name} ({assigned.score})"
+                + (" duplicate" if assigned.duplicate else "")
+                for (meta_shift_id, role), assigned in assigned_roles.items()
+            ),
+            level="debug",
+        )
+
+    # If there are 2 shifts, the end time of the first shift should be the start time of the second shift
+    # TODO: make this easier to read
+    # 2026 update: find the real shift change time by looking at the AMO shifts; if the most common AMO1 end time and the most common AMO2 start time match, that is the shift change time.
+    # (only applies if there are 2 shifts and AMOs scheduled)
+    if len(operating_day_meta["shifts"]) >= 2:
+        #print(f"Operating day meta: {operating_day_meta}")
+        #operating_day_meta["shifts"][0]["shift_times"]["end"] = operating_day_meta[
+        #    "shifts"
+        #][1]["shift_times"]["start"]
+        if len(operating_day_meta["shifts"][0]["amo"]) > 0 and len(operating_day_meta["shifts"][1]["amo"]) > 0:
+            # Counter breaks ties by first appearance (max over a set picked by hash order, which changes between processes)
+            most_common_amo1_end = collections.Counter([shift["shift_obj"].end_time for shift in operating_day_meta["shifts"][0]["amo"]]).most_common(1)[0][0]
+            most_common_amo2_start = collections.Counter([shift["shift_obj"].start_time for shift in operating_day_meta["shifts"][1]["amo"]]).most_common(1)[0][0]
+            if most_common_amo1_end == most_common_amo2_start:
+                operating_day_meta["shifts"][0]["shift_times"]["end"] = operating_day_meta["assumed_first_shift_end"] = most_common_amo1_end
+                operating_day_meta["shifts"][1]["shift_times"]["start"] = operating_day_meta["assumed_second_shift_start"] = most_common_amo2_start
+        else: # If there are no AMOs scheduled, fall back to the old method of just matching the end time of the first shift to the start time of the second shift
+            operating_day_meta["shifts"][0]["shift_times"]["end"] = operating_day_meta[
+                "shifts"
+            ][1]["shift_times"]["start"]
+
+        # Constrain the 3rd shift to the end time of the 2nd shift if it exists
+        if len(operating_day_meta["shifts"]) == 3:
+            operating_day_meta["shifts"][2]["shift_times"]["start"] = operating_day_meta[
+                "shifts"
+            ][1]["shift_times"]["end"]
+
+    if debug:
+        utils.cmdline.logger(
+            "Operating day:\n"
+            + json.dumps(operating_day_meta, indent=2, cls=NestedJSONEncoder),
+            level="debug",
+        )
+
+
+    return AssignedDay(
+        date=classified.date, operating_day_meta=operating_day_meta, key=classified.key
+    )
+
+
+### Stage 4: build the management team lines
+def render(assigned: AssignedDay, debug: bool = False) -> RenderedDay:
+    shifts = assigned.operating_day_meta
+    prefixes = {
+        "manager_on": "Manager on: ",
+        "second_manager": "Second manager: ",
+        "mod": "MOD: ",
+        #"north": "North coord: ",
+        #"south": "South coord: ",
+        "amo1/2": "AMO 1/2: ",
+        "amo3/4": "AMO 3/4: ",
+        "amo5/6": "AMO 5/6: ",
+        "amo7/8": "AMO 7/8: ",
+        "amo9/10": "AMO 9/10: ",
+    }
+
+    if not len(shifts["shifts"]):
+        # No shifts detected, no need to continue
+        raise NoShiftsDetectedError
+
+    outlist = []
+    for shift_id, shift in shifts["shifts"].items():
+        if shifts["detected_shifts"] >= 2:
+            time_fmts = ("%-I:%M%p", "%-I%p")
+
+            # Extract the start and end times of the shift and format them
+            start_time = shift["shift_times"]["start"].strftime(
+                time_fmts[0]
+                if shift["shift_times"]["start"].minute != 0
+                else time_fmts[1]
+            )
+            end_time = shift["shift_times"]["end"].strftime(
+                time_fmts[0]
+                if shift["shift_times"]["end"].minute != 0
+                else time_fmts[1]
+            )
+
+            # Prefix determination
+            prefix = "" if shift_id == 0 else "\n"
+
+            outlist.append(
+                f"{prefix}From {start_time.lower()} to {end_time.lower()}:"
+            )
+
+            if shift_id == 0:
+                amo = "amo1"
+            elif shift_id == 1:
+                amo = "amo2"
+
+        # Names picked by the assignment step in assign
+        picked = shift.get("assigned", {})
+        if "managers_on" in picked:
+            outlist.append(
+                prefixes["manager_on"]
+                + picked["managers_on"]
+                + ("*" if "duplicate" in shift and shift["duplicate"] else "")
+            )
+        if "second_managers" in picked:
+            outlist.append(prefixes["second_manager"] + picked["second_managers"])
+        if "mods" in picked:
+            outlist.append(prefixes["mod"] + picked["mods"])
+        #if "north_coords" in shift and len(shift["north_coords"]) > 0:
+        #    outlist.append(
+        #        prefixes["north"]
+        #        + max(shift["north_coords"], key=lambda s: s["score"])["name"]
+        #    )
+        #if "south_coords" in shift and len(shift["south_coords"]) > 0:
+        #    outlist.append(
+        #        prefixes["south"]
+        #        + max(shift["south_coords"], key=lambda s: s["score"])["name"]
+        #    )
+        
+        if "amo" in shift and len(shift["amo"]) > 0:
+            for amo_shift in shift["amo"]:
+                outlist.append(
+                    prefixes[f"amo{amo_shift['area'].strip()}"]
+                    + amo_shift["name"]
+                )
+
+    if "errors" in shifts and len(shifts["errors"]) > 0:
+        outlist.extend([""])
+        outlist.extend([f"*{error}" for error in shifts["errors"]])
+
+    return RenderedDay(date=assigned.date, lines=outlist, key=assigned.key)
+
+
+### Stage 5 (uncached): frame the lines for each channel
+# The greeting and "updated at" footer depend on when we answer, so they're never cached
+def compose(rendered: RenderedDay, updated_at: datetime.datetime) -> dict:
+    nowtime = datetime.datetime.now().time()
+    rand = random.randint(0, 25)
+    match nowtime:
+        case nowtime if nowtime.hour <= 11 and rand != 13:
+            friendly_time = "Good morning! 🌤️️🎢"
+        case nowtime if 12 <= nowtime.hour <= 17 and rand != 13:
+            friendly_time = "Good afternoon! ☀️🎢"
+        case nowtime if nowtime.hour >= 18 and rand != 13:
+            friendly_time = "Good evening! 🌙🎢"
+        case _:
+            friendly_time = "Hi there! 😀🎢"
+
+    outlist = [
+        friendly_time,
+        f"Management team for {rendered.date.strftime('%B %d, %Y')}",
+        "",
+    ]
+    outlist.extend(rendered.lines)
+    outlist.extend(
+        [
+            "",
+            f"Shifts updated at {updated_at.strftime('%H:%M')}",
+            'Reply "refresh" to update',
+        ]
+    )
+    shift_msg = "\n".join(outlist)
+
+    # The south message should remove lines beginning with "Second manager: " or "North coord: "
+    south_message = "\n".join(
+        [
+            line
+            for line in shift_msg.split("\n")
+            if not line.startswith("Second manager: ")
+            and not line.startswith("MOD: ")
+        ]
+    )
+
+    # The north message should remove lines beginning with "Second manager: " or "South coord: "
+    north_message = "\n".join(
+        [
+            line
+            for line in shift_msg.split("\n")
+            if not line.startswith("Second manager: ")
+            and not line.startswith("MOD: ")
+        ]
+    )
+
+    return {
+        "shift_msg": shift_msg,
+        "north_message": north_message,
+        "south_message": south_message,
+        # Set both groupme_a910_message and discord_message to south_message
+        "groupme_a910_message": south_message,
+        "discord_message": south_message,
+        # Set telegram_message to north_message
+        "telegram_message": north_message,
+    }
+
+
+### Stage 6: post to whichever channels the args select
+# GroupMe bot (utils.groupme) behind each GroupMe target
+GROUPME_BOTS = {
+    "groupme": "main",
+    "gm_debug": "dev",
+    "groupme910": "a910",
+    "groupme_north": "north",
+}
+
+
+# Sends to every target at once; returns target -> Delivery
+def deliver(messages: dict, config: Config, request: RefreshRequest) -> dict:
+    targets = request.targets
+    timeout = (config.get("delivery") or {}).get("timeout", delivery.DEFAULT_TIMEOUT)
+
+    sends = {}
+    if targets & set(GROUPME_BOTS):
+        gm = GroupMe(
+            config.groupme,
+            debug=request.debug,
+            main_bot="groupme" in targets,
+            dev_bot="gm_debug" in targets,
+            a910_bot="groupme910" in targets,
+            north_bot="groupme_north" in targets,
+        )
+        _messages = {
+            "main": messages["shift_msg"],
+            "a910": messages["north_message"],
+            "north": messages["north_message"],
+        }
+        bot_sends = gm.senders(request.message if request.message else _messages, timeout)
+        sends |= {
+            target: bot_sends[bot]
+            for target, bot in GROUPME_BOTS.items()
+            if bot in bot_sends
+        }
+    #if targets & {"discord", "discord_debug"} and False:  # Disable Discord posting for now
+    #    channel_id = (
+    #        config.discord.test_channel_id
+    #        if "discord_debug" in targets
+    #        else config.discord.main_channel_id
+    #    )
+    #    ds = SingleMessageClient(
+    #        channel_id=channel_id, message=messages["discord_message"]
+    #    )
+    #    sends["discord_debug" if "discord_debug" in targets else "discord"] = (
+    #        lambda: ds.run(config.discord.bot_token)
+    #    )
+    if targets & {"telegram12", "telegram_debug"}:
+        tb = TelegramBot(config)
+        target = "telegram12" if "telegram12" in targets else "telegram_debug"
+        text = request.message if request.message else messages["telegram_message"]
+        chat_id = (
+            config.telegram.a12_chat_id
+            if target == "telegram12"
+            else config.telegram.test_chat_id
+        )
+        sends[target] = lambda: tb.send(text, chat_id, timeout=timeout)
+
+    results = delivery.dispatch(sends, timeout)
+    for result in results.values():
+        if not result.ok:
+            utils.cmdline.logger(
+                f"Delivery to {result.target} failed after {result.latency:.2f}s: "
+                f"{result.error or 'rejected'}",
+                level="error",
+            )
+        elif request.debug:
+            utils.cmdline.logger(
+                f"Delivered to {result.target} in {result.latency:.2f}s", level="debug"
+            )
+    return results
+
+
+# fetch -> classify -> assign -> render; compose and deliver happen per request
+def _from_snapshot(snapshot) -> ComputedDay:
+    operating_day_meta, rendered = snapshot.value
+    return ComputedDay(
+        date=snapshot.date,
+        source=snapshot.source,
+        updated_at=snapshot.fetched_at,
+        operating_day_meta=operating_day_meta,
+        rendered=rendered,
+    )
+
+
+# Past days don't change anymore, so they're answered from the snapshot store without fetching
+# Today and later are answered from it too while the last fetch (usually the scheduler's) is
+# younger than max_age seconds
+# (debug runs always fetch and recompute so the scoring shows up in the debug output)
+def _stored_snapshot(
+    date: datetime.date, source: str, version: str, debug: bool, max_age: float = 0
+):
+    if debug:
+        return None
+    now = datetime.datetime.now()
+    if date >= now.date() and max_age <= 0:
+        return None
+    snapshot = snapshot_store.latest(date, source, version)
+    if snapshot is None:
+        return None
+    if date >= now.date() and (now - snapshot.fetched_at).total_seconds() > max_age:
+        return None
+    digest_stats["snapshot"] += 1
+    return snapshot
+
+
+def compute_day(
+    config: Config,
+    config_path: Path,
+    date_arg: str | None = None,
+    api: bool = False,
+    debug: bool = False,
+) -> ComputedDay:
+    version = result_version(config)
+
+    snapshot = _stored_snapshot(
+        resolve_date(date_arg),
+        "api" if api else "w2w",
+        version,
+        debug,
+        max_age=(config.get("cache") or {}).get("snapshot_ttl", 0),
+    )
+    if snapshot is not None:
+        return _from_snapshot(snapshot)
+
+    fetched = fetch(config, config_path, date_arg=date_arg, api=api, debug=debug)
+    return compute_fetched(config, fetched, version, debug=debug)
+
+
+# Score, render and store a fetched day
+def compute_fetched(
+    config: Config, fetched: FetchedDay, version: str, debug: bool = False
+) -> ComputedDay:
+    # Nothing changed since the last computation for this day: skip straight to the stored result
+    snapshot = (
+        None if debug else snapshot_store.get(fetched.date, fetched.source, fetched.key)
+    )
+    if snapshot is not None:
+        digest_stats["hit"] += 1
+        operating_day_meta, rendered = snapshot.value
+        snapshot_store.touch(
+            fetched.date, fetched.source, fetched.key, fetched.fetched_at
+        )
+    else:
+        digest_stats["miss"] += 1
+        classified = run_stage("classify", classify, fetched, debug=debug)
+        assigned = run_stage(
+            "assign", assign, classified, scoring.load_rules(config), debug=debug
+        )
+
+        try:
+            rendered = run_stage("render", render, assigned, debug=debug)
+        except NoShiftsDetectedError:
+            if debug:
+                utils.cmdline.logger(
+                    "No shifts detected, exiting",
+                    level="debug",
+                )
+            rendered = None
+
+        operating_day_meta = assigned.operating_day_meta
+        snapshot_store.put(
+            fetched.date,
+            fetched.source,
+            fetched.key,
+            version,
+            fetched.fetched_at,
+            fetched.shifts,
+            (operating_day_meta, rendered),
+            operating_day_meta=operating_day_meta,
+            messages=(
+                compose(rendered, fetched.fetched_at) if rendered is not None else None
+            ),
+        )
+
+    if debug:
+        utils.cmdline.logger(
+            f"Schedule digest {fetched.key[:12]}: {dict(digest_stats)}", level="debug"
+        )
+
+    return ComputedDay(
+        date=fetched.date,
+        source=fetched.source,
+        updated_at=fetched.fetched_at,
+        operating_day_meta=operating_day_meta,
+        rendered=rendered,
+    )
+
+
+# Batches of a range fetched and scored at once; each batch fetches its filters in parallel too,
+# so keep this small enough to stay inside the HTTP connection pool
+RANGE_WORKERS = 3
+
+
+# Compute every day in dates, yielding each one as soon as its batch is done (so not in date order)
+# W2W days come a week per request (per filter), API days a day per request
+# Days that fail are logged and skipped
+def compute_range(
+    config: Config,
+    config_path: Path,
+    dates: list[datetime.date],
+    api: bool = False,
+    debug: bool = False,
+):
+    source = "api" if api else "w2w"
+    version = result_version(config)
+    filters = list(config["whentowork"]["filters"].items())
+
+    pending = []
+    for date in dates:
+        snapshot = _stored_snapshot(date, source, version, debug)
+        if snapshot is not None:
+            yield _from_snapshot(snapshot)
+        else:
+            pending.append(date)
+    if not pending:
+        return
+
+    # One login (or client) for the whole range
+    if api:
+        session = RidesAPI(config.rides_api, debug=debug)
+        batches = [[date] for date in pending]
+    else:
+        session = W2WSession(config.whentowork, debug=debug)
+        config.save(filename=config_path)
+        weeks: dict = {}
+        for date in pending:
+            weeks.setdefault(week_of(date)[0], []).append(date)
+        batches = list(weeks.values())
+
+    def _compute(batch: list[datetime.date]) -> list:
+        if api:
+            schedules = {
+                date: session.retrieve_schedules(filters, date=date.isoformat())
+                for date in batch
+            }
+        else:
+            schedules = session.retrieve_schedules_range(filters, batch)
+
+        days = []
+        for date in batch:
+            try:
+                fetched = fetched_day(config, date, source, schedules[date])
+                days.append((date, compute_fetched(config, fetched, version, debug=debug)))
+            except Exception as e:
+                days.append((date, e))
+        return days
+
+    with ThreadPoolExecutor(max_workers=RANGE_WORKERS) as pool:
+        futures = {pool.submit(_compute, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            try:
+                days = future.result()
+            except Exception as e:
+                days = [(date, e) for date in futures[future]]
+            for date, day in days:
+                if isinstance(day, Exception):
+                    utils.cmdline.logger(
+                        f"Could not compute {date.strftime('%m/%d/%Y')}: {day!r}"
+                    )
+                else:
+                    yield day
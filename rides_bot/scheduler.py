@@ -0,0 +1,80 @@
+import datetime, signal, sys, os, time
+
+# Find the absolute path of this script and append the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from threading import Event
+
+import utils.cmdline
+from utils.config import Config
+from rides_bot.app import CONFIG_FILE_PATH
+import rides_bot.pipeline as pipeline
+
+# Keeps today's and the next few days' results warm in the snapshot store, so "refresh" and
+# "analyze" in the front-ends read a stored day instead of fetching and scoring on demand
+# Days whose schedule digest didn't move are only re-fetched, never rescored
+
+default_settings = {
+    "interval": 300,  # seconds between runs during operating hours
+    "days_ahead": 1,  # today plus this many days
+    "operating_hours": [7, 23],  # local [start, end) hours the scheduler runs in
+    "api": True,  # warm the Rides API results (what the listeners and GroupMe use) instead of W2W
+}
+
+
+def handle_sigterm(*args, **kwargs):
+    """
+    Handle SIGTERM signal, which will occur when this program runs as a systemd service.
+    Raises KeyboardInterrupt to stop the program as if it was stopped by a keyboard interrupt.
+    """
+    raise KeyboardInterrupt
+
+
+def settings(config: Config) -> dict:
+    return default_settings | dict(config.get("scheduler") or {})
+
+
+def in_operating_hours(now: datetime.datetime, hours: list) -> bool:
+    return hours[0] <= now.hour < hours[1]
+
+
+# Fetch (and score, if anything changed) today and the next days_ahead days
+def precompute(config: Config, days_ahead: int, api: bool) -> int:
+    today = datetime.datetime.now().date()
+    dates = [today + datetime.timedelta(days=i) for i in range(days_ahead + 1)]
+
+    started = time.perf_counter()
+    computed = sum(
+        1 for _ in pipeline.compute_range(config, CONFIG_FILE_PATH, dates, api=api)
+    )
+    utils.cmdline.logger(
+        f"Precomputed {computed}/{len(dates)} days in {time.perf_counter() - started:.1f}s "
+        f"({dict(pipeline.digest_stats)})"
+    )
+    return computed
+
+
+def run(stop_event: Event) -> None:
+    while not stop_event.is_set():
+        # Reload every run so config changes (and refreshed W2W cookies) are picked up
+        config = Config().load(CONFIG_FILE_PATH)
+        conf = settings(config)
+
+        if in_operating_hours(datetime.datetime.now(), conf["operating_hours"]):
+            try:
+                precompute(config, conf["days_ahead"], conf["api"])
+            except Exception as e:
+                print(f"Error: {e}")
+
+        stop_event.wait(conf["interval"])
+
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    stop_event = Event()
+
+    try:
+        run(stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+        sys.exit(0)
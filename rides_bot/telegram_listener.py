@@ -8,7 +8,9 @@ from threading import Event
 
 from utils.config import Config
 from utils.telegram import TelegramBot
-from rides_bot.app import run_bot, CONFIG_FILE_PATH
+from utils.offload import BlockingRunner, concurrency_limit
+from rides_bot.app import refresh, CONFIG_FILE_PATH
+from rides_bot.pipeline import RefreshRequest
 
 config = Config().load(CONFIG_FILE_PATH)
 
@@ -21,33 +23,23 @@ def handle_sigterm(*args, **kwargs):
     raise KeyboardInterrupt
 
 
-class Args:
-    def __init__(self):
-        self.return_discord_message = False
-        self.debug = False
-        self.gm_debug = False
-        self.login = False
-        self.groupme = False
-        self.discord = False
-        self.discord_debug = False
-        self.date = None
-        self.message = ""
-        self.telegram12 = False
-        self.telegram_debug = False
-        self.return_telegram_message = True
-
-
 class TelegramListener:
     def __init__(self):
         self.conf = config
         self.token = config.telegram.token
         self.a12_chat_id = config.telegram.a12_chat_id
         self.test_chat_id = config.telegram.test_chat_id
-        self.args = Args()
-
-        self.args.api = True
-
-        self.app = Application.builder().token(self.token).build()
+        self.runner = BlockingRunner(concurrency_limit(config), name="telegram")
+        # Same source as the other front-ends unless the config says otherwise
+        self.use_api = (config.get("listeners") or {}).get("api", True)
+
+        # Handle updates concurrently so one chat's refresh doesn't hold up the others
+        self.app = (
+            Application.builder()
+            .token(self.token)
+            .concurrent_updates(self.runner.limit)
+            .build()
+        )
 
     async def send_message(self, message: str, chat_id: int = None) -> bool:
         chat_id = chat_id if chat_id is not None else self.a12_chat_id
@@ -68,13 +60,17 @@ class TelegramListener:
         print(f"Message: {message}")
 
         if chat_id == self.a12_chat_id:
-            self.args.telegram12 = True
+            targets = {"telegram12"}
         elif chat_id == self.test_chat_id:
-            self.args.telegram_debug = True
+            targets = {"telegram_debug"}
+        else:
+            targets = set()
 
         if message.lower().strip() == "refresh":
             print("Refreshing...")
-            await self.send_message(run_bot(self.args), chat_id)
+            request = RefreshRequest(api=self.use_api, targets=targets, output="telegram")
+            result = await self.runner.run(refresh, request)
+            await self.send_message(result.reply, chat_id)
 
 
 if __name__ == "__main__":
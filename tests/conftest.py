@@ -0,0 +1,18 @@
+import pytest
+
+import utils.descriptions as descriptions
+import utils.state as state
+
+
+# Keep the description cache out of the real state directory, and start every test with a cold one
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(state, "STATE_DIR", tmp_path)
+    monkeypatch.setattr(
+        descriptions,
+        "_persistent_cache",
+        state.PersistentLRU("descriptions", "description_class", max_entries=2000),
+    )
+    descriptions.classify.cache_clear()
+    yield tmp_path
+    descriptions.classify.cache_clear()
@@ -0,0 +1,118 @@
+import datetime
+
+import rides_bot.pipeline as pipeline
+import utils.scoring as scoring
+from utils.assignment import Assigned, assign_roles
+from utils.w2w import Shift
+
+
+def _meta(*meta_shifts):
+    return {
+        "shifts": {
+            meta_shift_id: {
+                role: list(meta_shift.get(role, []))
+                for role in ("managers_on", "second_managers", "mods")
+            }
+            for meta_shift_id, meta_shift in enumerate(meta_shifts)
+        }
+    }
+
+
+def _lines(day: dict) -> list[str]:
+    shifts = {
+        label: [Shift(*row) for row in day.get(label, [])]
+        for label in ("managers", "assistants", "coords", "amo1", "amo2")
+    }
+    fetched = pipeline.FetchedDay(
+        date=datetime.date(2026, 5, 30),
+        source="w2w",
+        shifts=shifts,
+        fetched_at=datetime.datetime(2026, 5, 30, 8),
+    )
+    assigned = pipeline.assign(pipeline.classify(fetched), scoring.load_rules())
+    return pipeline.render(assigned).lines
+
+
+def test_one_person_can_hold_several_roles_in_a_meta_shift():
+    ann = {"name": "Ann", "score": 100}
+    assert assign_roles(_meta({"managers_on": [ann], "mods": [ann]})) == {
+        (0, "managers_on"): Assigned("Ann", 100),
+        (0, "mods"): Assigned("Ann", 100),
+    }
+
+
+def test_manager_on_goes_to_a_different_person_per_meta_shift():
+    assigned = assign_roles(
+        _meta(
+            {"managers_on": [{"name": "Ann", "score": 400}, {"name": "Bob", "score": 390}]},
+            {"managers_on": [{"name": "Ann", "score": 380}, {"name": "Bob", "score": 100}]},
+        )
+    )
+    assert assigned[(0, "managers_on")] == Assigned("Bob", 390)
+    assert assigned[(1, "managers_on")] == Assigned("Ann", 380)
+
+
+def test_lone_manager_on_covers_every_meta_shift_without_a_conflict():
+    assigned = assign_roles(
+        _meta(
+            {"managers_on": [{"name": "Ann", "score": 400}]},
+            {"managers_on": [{"name": "Ann", "score": 200}]},
+        )
+    )
+    assert assigned[(0, "managers_on")] == Assigned("Ann", 400)
+    assert assigned[(1, "managers_on")] == Assigned("Ann", 200)
+
+
+def test_two_managers_on_for_one_meta_shift_conflict():
+    assigned = assign_roles(
+        _meta(
+            {"managers_on": [{"name": "Ann", "score": 100}, {"name": "Bob", "score": 100}]}
+        )
+    )
+    assert assigned[(0, "managers_on")] == Assigned("Ann", 100, duplicate=True)
+
+
+def test_optional_role_never_gives_up_a_higher_score_to_fill_a_slot():
+    assigned = assign_roles(
+        _meta(
+            {"mods": [{"name": "Ray", "score": 500}, {"name": "Yul", "score": 400}]},
+            {"mods": [{"name": "Ray", "score": 450}]},
+        )
+    )
+    assert assigned[(0, "mods")] == Assigned("Ray", 500)
+    assert (1, "mods") not in assigned
+
+
+def test_specified_shift_pins_the_candidate():
+    ray = {"name": "Ray", "score": 500, "specified_shift": 0}
+    assigned = assign_roles(
+        _meta(
+            {"mods": [ray, {"name": "Yul", "score": 400}]},
+            {"mods": [dict(ray, score=500)]},
+        )
+    )
+    assert assigned[(0, "mods")] == Assigned("Ray", 500)
+    assert (1, "mods") not in assigned
+
+
+def test_manager_on_with_mod_in_description_is_manager_on_and_mod():
+    lines = _lines(
+        {"managers": [("Ann", "8am", "3pm", "7.0", "Manager on 8am-3pm MOD")]}
+    )
+    assert lines == ["Manager on: Ann", "MOD: Ann"]
+
+
+def test_mod_1st_shift_stays_on_the_first_shift():
+    lines = _lines(
+        {
+            "managers": [
+                ("Ann", "8am", "3pm", "7.0", "Manager on 8am-3pm"),
+                ("Bob", "3pm", "10pm", "7.0", "Manager on 3pm-10pm"),
+                ("Ray", "8am", "3pm", "7.0", "MOD 1st shift"),
+            ],
+            "amo1": [("Yul", "8am", "3pm", "7.0", "AMO 7/8")],
+        }
+    )
+    assert "MOD: Ray" in lines[: lines.index("\nFrom 3pm to 10pm:")]
+    assert "MOD: Yul" not in lines
+    assert not any("Multiple managers" in line for line in lines)
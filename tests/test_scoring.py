@@ -0,0 +1,70 @@
+import datetime, random
+
+import pytest
+
+import utils.scoring as scoring
+import utils.shift_logic as shift_logic
+from utils.w2w import Shift
+
+_descriptions = [
+    "Manager on 8:00am-3:00pm",
+    "manager on: 3pm-10pm",
+    "Second Manager 8a - 3p",
+    "MOD",
+    "Manager on 1st shift",
+    "second manager from 4 to 10pm",
+    "MOD 2nd shift",
+    "Manager on",
+    "Manager on 8",
+    "first shift manager on",
+    "Manager onn 8-3",
+    "2nd manager",
+    "Manager on 3pm-10pm 2nd shift",
+    "ride ops",
+]
+_times = [
+    ("8am", "3pm", "7.0"),
+    ("8am", "6pm", "10.0"),
+    ("3pm", "10pm", "7.0"),
+    ("10am", "10pm", "12.0"),
+    ("2pm", "11pm", "9.0"),
+    ("6pm", "11pm", "5.0"),
+    ("7:30am", "4pm", "8.5"),
+]
+_hours = [8, 10, 14, 15, 16, 18, 22, 23]
+
+
+# The score matrix has to give exactly the score determine_shift gives for every shift and window
+@pytest.mark.parametrize("seed", range(200))
+def test_score_matrix_matches_determine_shift(seed):
+    rnd = random.Random(seed)
+    shifts = [
+        Shift(f"p{i}", *rnd.choice(_times), rnd.choice(_descriptions))
+        for i in range(rnd.randint(1, 9))
+    ]
+    for shift in shifts:
+        if rnd.random() < 0.3:
+            shift.mod_times = {
+                "start_time": datetime.time(rnd.randint(6, 22)),
+                "end_time": datetime.time(rnd.randint(6, 23)),
+            }
+    day_meta = {"detected_shifts": rnd.choice([1, 2, 2, 3])}
+    # Mostly real shift boundaries, so the exact description times rule gets exercised too
+    hours = [rnd.choice(_hours + [rnd.randint(0, 23)]) for _ in range(8)]
+    windows = [
+        (
+            rnd.choice([-1, 0, 1, 2]),
+            datetime.time(hours[2 * i]),
+            datetime.time(hours[2 * i + 1]),
+        )
+        for i in range(rnd.randint(1, 4))
+    ]
+
+    matrix = scoring.score_matrix(day_meta, shifts, windows).tolist()
+
+    for i, (shift_id, start, end) in enumerate(windows):
+        for j, shift in enumerate(shifts):
+            expected = shift_logic.determine_shift(
+                day_meta, shift, start, end, match_multiple=True, shift_id=shift_id
+            )[3]
+            assert matrix[i][j] == expected, (shift.description, shift_id, start, end)
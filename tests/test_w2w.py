@@ -0,0 +1,49 @@
+import datetime
+
+from utils.w2w import _parse_week, week_of
+
+WEEK = week_of(datetime.date(2026, 5, 30))  # Sunday 05/24 - Saturday 05/30
+
+
+def _record(name: str, times: str = "8am - 3pm") -> str:
+    return f'swl("1",2,"#000000","{name}","2","{times}","   7.0 hours","Manager on");'
+
+
+def _page(*days) -> str:
+    # days are (MM/DD/YYYY, [names])
+    return "\n".join(
+        f'<a href="#">{date}</a>' + "".join(_record(name) for name in names)
+        for date, names in days
+    )
+
+
+def _week_page(**extra) -> list:
+    return [
+        (date.strftime("%m/%d/%Y"), extra.get(date.strftime("d%d"), []))
+        for date in WEEK
+    ]
+
+
+def test_records_go_to_the_date_before_them():
+    days = _parse_week(_page(*_week_page(d24=["Ann"], d30=["Bob", "Cal"])), WEEK)
+    assert [s.employee for s in days[datetime.date(2026, 5, 24)]] == ["Ann"]
+    assert [s.employee for s in days[datetime.date(2026, 5, 30)]] == ["Bob", "Cal"]
+    assert sum(len(shifts) for shifts in days.values()) == 3
+
+
+def test_records_under_a_trailing_out_of_week_date_are_skipped():
+    days = _parse_week(
+        _page(*_week_page(d30=["Bob"]), ("05/31/2026", ["Dee"])), WEEK
+    )
+    assert [s.employee for s in days[datetime.date(2026, 5, 30)]] == ["Bob"]
+    assert all(s.employee != "Dee" for shifts in days.values() for s in shifts)
+
+
+def test_week_not_starting_on_sunday_is_rejected():
+    # Monday-Sunday: 05/24 isn't on the page
+    page = _page(*_week_page(d30=["Bob"])[1:], ("05/31/2026", ["Dee"]))
+    assert _parse_week(page, WEEK) is None
+
+
+def test_records_before_any_date_are_rejected():
+    assert _parse_week(_record("Ann") + _page(*_week_page()), WEEK) is None
@@ -0,0 +1,193 @@
+from typing import NamedTuple
+
+
+# Role assignment for a day: each role's (meta shift) slots are solved together as a min-cost
+# assignment over the candidate scores, instead of taking the best score for each slot on its own
+# A person fills one slot per role for the whole day, or one per meta shift if they work a double
+# Roles are solved separately, so one person can still hold several roles (e.g. manager on and MOD)
+
+ROLES = ("managers_on", "second_managers", "mods")
+
+# Roles that always get someone: they're filled with as many different people as possible first,
+# then by score, and a slot nobody is left for falls back to its best score
+# Other roles never give up a higher score to fill one more slot, and are left empty instead
+REQUIRED_ROLES = ("managers_on",)
+
+
+class Assigned(NamedTuple):
+    name: str
+    score: int
+    duplicate: bool = False  # another person was scheduled for this slot and had nowhere else to go
+
+
+# Hungarian algorithm (shortest augmenting paths with potentials), O(rows^2 * columns)
+# Returns the column assigned to each row; needs rows <= columns and a finite cost for every row
+def min_cost_assignment(cost: list[list[int]]) -> list[int]:
+    rows = len(cost)
+    columns = len(cost[0]) if rows else 0
+    u = [0] * (rows + 1)
+    v = [0] * (columns + 1)
+    owner = [0] * (columns + 1)  # row (1-based) holding each column, 0 = free
+    way = [0] * (columns + 1)
+
+    for row in range(1, rows + 1):
+        owner[0] = row
+        column = 0
+        min_reduced = [float("inf")] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[column] = True
+            current_row = owner[column]
+            delta = float("inf")
+            next_column = 0
+            for j in range(1, columns + 1):
+                if used[j]:
+                    continue
+                reduced = cost[current_row - 1][j - 1] - u[current_row] - v[j]
+                if reduced < min_reduced[j]:
+                    min_reduced[j] = reduced
+                    way[j] = column
+                if min_reduced[j] < delta:
+                    delta = min_reduced[j]
+                    next_column = j
+            for j in range(columns + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_reduced[j] -= delta
+            column = next_column
+            if owner[column] == 0:
+                break
+        # Flip the augmenting path
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    assignment = [-1] * rows
+    for j in range(1, columns + 1):
+        if owner[j]:
+            assignment[owner[j] - 1] = j - 1
+    return assignment
+
+
+# A "1st shift"/"2nd shift" specifier pins a candidate to that meta shift, if the day has it
+def _allowed(candidate: dict, meta_shift_id: int, meta_shift_ids) -> bool:
+    specified = candidate.get("specified_shift")
+    return specified is None or specified not in meta_shift_ids or specified == meta_shift_id
+
+
+def _best(candidates: list[dict]) -> dict:
+    return max(candidates, key=lambda s: s["score"])
+
+
+def _assign_role(
+    operating_day_meta: dict, role: str, doubles
+) -> dict[tuple[int, str], Assigned]:
+    meta_shift_ids = list(operating_day_meta["shifts"])
+    slots = [
+        meta_shift_id
+        for meta_shift_id, meta_shift in operating_day_meta["shifts"].items()
+        if len(meta_shift.get(role) or []) > 0
+    ]
+    if not slots:
+        return {}
+
+    candidates = {
+        meta_shift_id: [
+            candidate
+            for candidate in operating_day_meta["shifts"][meta_shift_id][role]
+            if _allowed(candidate, meta_shift_id, meta_shift_ids)
+        ]
+        for meta_shift_id in slots
+    }
+
+    # One column per person, or per person and meta shift for doubles
+    # Doubles' columns only take slots in their own meta shift
+    def _column(name: str, meta_shift_id: int) -> tuple:
+        return (name, meta_shift_id if name in doubles else None)
+
+    columns = {}
+    for meta_shift_id, slot_candidates in candidates.items():
+        for candidate in slot_candidates:
+            columns.setdefault(_column(candidate["name"], meta_shift_id), len(columns))
+
+    scores = sorted(
+        {c["score"] for slot_candidates in candidates.values() for c in slot_candidates}
+    )
+    if role in REQUIRED_ROLES:
+        # Total score, shifted so every candidate is worth at least 1
+        weights = {score: score - scores[0] + 1 for score in scores} if scores else {}
+    else:
+        # Each score is worth more than any number of lower ones put together, so the best
+        # score of the day gets its slot, then the next best, and so on, the way picking them
+        # one at a time would; filling another slot can't outweigh a higher score
+        weights = {score: (len(slots) + 1) ** rank for rank, score in enumerate(scores)}
+
+    # Scores are scaled so the list position can break ties the way max() does (first one wins)
+    # without ever outweighing a real score difference
+    longest = max(len(slot_candidates) for slot_candidates in candidates.values())
+    scale = len(slots) * longest + 1
+    bound = len(slots) * (max(weights.values(), default=0) + 1) * scale
+    # A required slot left unfilled costs more than any trade between real candidates,
+    # and forbidden pairs cost more than leaving every slot unfilled
+    unfilled = 2 * bound + 1 if role in REQUIRED_ROLES else 0
+    forbidden = (unfilled + bound + 1) * (len(slots) + 1)
+
+    cost = []
+    for slot_index, meta_shift_id in enumerate(slots):
+        row = [forbidden] * (len(columns) + len(slots))
+        for position, candidate in enumerate(candidates[meta_shift_id]):
+            column = columns[_column(candidate["name"], meta_shift_id)]
+            row[column] = min(
+                row[column], -weights[candidate["score"]] * scale + position
+            )
+        # Each slot has its own "nobody" column
+        row[len(columns) + slot_index] = unfilled
+        cost.append(row)
+
+    names = list(columns)
+    assigned = {}
+    for meta_shift_id, column in zip(slots, min_cost_assignment(cost)):
+        if column < len(names):
+            name = names[column][0]
+            best = _best([c for c in candidates[meta_shift_id] if c["name"] == name])
+            assigned[(meta_shift_id, role)] = Assigned(name=name, score=best["score"])
+        elif role in REQUIRED_ROLES:
+            # Nobody else left: whoever fits best covers this one too
+            best = _best(
+                candidates[meta_shift_id]
+                or operating_day_meta["shifts"][meta_shift_id][role]
+            )
+            assigned[(meta_shift_id, role)] = Assigned(name=best["name"], score=best["score"])
+
+    # Someone scheduled for a required role who didn't get any slot conflicts with whoever
+    # got their best one
+    if role in REQUIRED_ROLES:
+        picked = {a.name for a in assigned.values()}
+        for name in dict.fromkeys(n for n, _ in names if n not in picked):
+            slot, _ = max(
+                (
+                    ((meta_shift_id, role), c["score"])
+                    for meta_shift_id in slots
+                    for c in candidates[meta_shift_id]
+                    if c["name"] == name
+                ),
+                key=lambda s: s[1],
+            )
+            if slot in assigned:
+                assigned[slot] = assigned[slot]._replace(duplicate=True)
+
+    return assigned
+
+
+# Solve the day's slots from the candidate lists in operating_day_meta
+# doubles are the names allowed to fill a slot in every meta shift
+def assign_roles(
+    operating_day_meta: dict, doubles: set | frozenset = frozenset()
+) -> dict[tuple[int, str], Assigned]:
+    assigned = {}
+    for role in ROLES:
+        assigned.update(_assign_role(operating_day_meta, role, doubles))
+    return assigned
@@ -0,0 +1,81 @@
+import hashlib, json, os, threading
+import requests, requests.adapters
+
+# Process-wide registry of long-lived clients so every refresh reuses warm, keep-alive connections
+# Entries are keyed by name and hold (fingerprint, client); a changed fingerprint (i.e. the config
+# changed) rebuilds the client, and a forked child (gunicorn workers) starts with an empty registry
+_registry: dict = {}
+_lock = threading.Lock()
+_pid = os.getpid()
+
+
+def _reset_after_fork() -> None:
+    global _lock, _pid
+    _registry.clear()
+    _lock = threading.Lock()
+    _pid = os.getpid()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _fingerprint(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def _get(name: str, fingerprint: str, build):
+    with _lock:
+        # Belt and braces for anything that forked without going through os.fork
+        if _pid != os.getpid():
+            _reset_after_fork()
+
+        entry = _registry.get(name)
+        if entry is None or entry[0] != fingerprint:
+            entry = _registry[name] = (fingerprint, build())
+        return entry[1]
+
+
+def _build_http_adapter() -> requests.adapters.HTTPAdapter:
+    return requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+
+
+def _mount(session: requests.Session, adapter: requests.adapters.HTTPAdapter) -> requests.Session:
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# A pooled requests session; key is anything that should force a fresh session when it changes
+# The session (cookies included) is shared by everything using this name
+def http_session(name: str, *key) -> requests.Session:
+    return _get(
+        f"http:{name}",
+        _fingerprint(*key),
+        lambda: _mount(requests.Session(), _build_http_adapter()),
+    )
+
+
+# A session of its own (its own cookie jar) over the process's connection pool for name
+# For clients that log in and keep their own cookies, like W2WSession
+def pooled_session(name: str) -> requests.Session:
+    return _mount(
+        requests.Session(), _get(f"adapter:{name}", _fingerprint(), _build_http_adapter)
+    )
+
+
+def supabase_client(config):
+    # Imported here so W2W-only code paths don't need supabase installed
+    from supabase import create_client
+
+    return _get(
+        "supabase",
+        _fingerprint(config.base_url, config.key),
+        lambda: create_client(config.base_url, config.key),
+    )
+
+
+# Only for sends on utils.telegram's event loop; the bot's HTTP client belongs to that loop
+def telegram_bot(token: str):
+    import telegram
+
+    return _get("telegram", _fingerprint(token), lambda: telegram.Bot(token))
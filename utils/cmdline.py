@@ -23,6 +23,7 @@ def colorize(string: str, colors: list[str] = [cmd_colors.ENDC]) -> str:
 class headers:
     info = colorize("[info]", colors=[cmd_colors.BOLD, cmd_colors.OKCYAN])
     debug = colorize("[debug]", colors=[cmd_colors.BOLD, cmd_colors.WARNING])
+    error = colorize("[error]", colors=[cmd_colors.BOLD, cmd_colors.FAIL])
 
 
 # Define a logger
@@ -117,7 +118,7 @@ default_args = {
     },
     "date": {
         "flag": "D",
-        "help": "Retrieve date (MM/DD/YYYY)",
+        "help": "Retrieve date (MM/DD/YYYY) or range (MM/DD/YYYY..MM/DD/YYYY)",
         "kwargs": {},
     },
 }
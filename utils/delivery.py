@@ -0,0 +1,65 @@
+import os, threading, time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+# Fan-out delivery: every target's send runs at the same time on a shared thread pool, so
+# delivering takes as long as the slowest target instead of the sum of all of them
+# A target that hasn't answered within the timeout is reported as failed (its send keeps its own
+# HTTP timeout, so the thread doesn't hang on it either)
+
+DEFAULT_TIMEOUT = 10  # seconds
+
+_MAX_WORKERS = 8
+
+
+class Delivery(NamedTuple):
+    target: str
+    ok: bool
+    latency: float  # seconds
+    error: str | None = None
+
+
+_executor = None
+_lock = threading.Lock()
+_pid = None
+
+
+# Threads don't survive a fork, so each process (gunicorn worker) builds its own pool
+def _pool() -> ThreadPoolExecutor:
+    global _executor, _pid
+    with _lock:
+        if _executor is None or _pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=_MAX_WORKERS, thread_name_prefix="delivery"
+            )
+            _pid = os.getpid()
+        return _executor
+
+
+# sends is target -> callable returning whether the target accepted the message
+def dispatch(sends: dict, timeout: float | None = DEFAULT_TIMEOUT) -> dict[str, Delivery]:
+    if not sends:
+        return {}
+
+    def _timed(send):
+        started = time.perf_counter()
+        try:
+            return bool(send()), None, time.perf_counter() - started
+        except Exception as e:
+            return False, repr(e), time.perf_counter() - started
+
+    started = time.perf_counter()
+    futures = {target: _pool().submit(_timed, send) for target, send in sends.items()}
+    wait(futures.values(), timeout=timeout)
+
+    results = {}
+    for target, future in futures.items():
+        if future.done():
+            ok, error, latency = future.result()
+            results[target] = Delivery(target, ok, latency, error)
+        else:
+            future.cancel()
+            results[target] = Delivery(
+                target, False, time.perf_counter() - started, "timed out"
+            )
+    return results
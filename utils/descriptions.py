@@ -0,0 +1,259 @@
+import collections, datetime, functools, hashlib, json, regex as re
+from typing import NamedTuple
+
+from .state import PersistentLRU
+from .timeparse import to_time
+
+
+# Hold the regex for our description filters
+_description_regex = {
+    "is_manager_on": r"(?:manager taking calls|manager on)",
+    "manager_on_times": r"(?:manager taking calls|manager on)(?:\sfrom\s|:\s?|\s?[-]\s?|\s{1,2})?(?P<start_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<start_am_pm>am|pm|a|p?)?(?:\s?[-]\s?|\s?to\s?)?(?P<end_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<end_am_pm>am|pm|a|p?)?",
+    "manager_shift_specifier": r"(?:1st shift|2nd shift|first shift|second shift)",
+    "is_second_manager": r"(?!.*\bcheck in\b)(?:second manager|2nd manager)",
+    "second_manager_times": r"(?:second manager|2nd manager)(?:\sfrom\s|:\s?|\s?[-]\s?|\s{1,2})?(?P<start_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<start_am_pm>am|pm|a|p?)?(?:\s?[-]\s?|\s?to\s?)?(?P<end_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<end_am_pm>am|pm|a|p?)?",
+    #"is_north_south_coord": r"^(?<!(?:shadow\s))(?:wwns\s?-?\s?)?(?P<which>north|south)(\s?(?=coord|coordinator))",
+    #"north_south_coord_times": r"^(?<!(?:shadow\s))(?:wwns\s?-?\s?)?(?P<which>north|south)(\s?(?=coord|coordinator))(?:coord|coordinator)?(?:\sfrom\s|:\s?|\s?[-]\s?|\s{1,2})?(?P<start_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<start_am_pm>am|pm|a|p?)?(?:\s?[-]\s?|\s?to\s?)?(?P<end_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<end_am_pm>am|pm|a|p?)?",
+    "mod": r"(?:MOD)",
+}
+
+# Wrap each pattern with its fuzzy error budget
+_description_patterns_fuzzy = {
+    "is_manager_on": f"({_description_regex['is_manager_on']}){{3s+1i<=1}}",
+    "manager_on_times": f"({_description_regex['manager_on_times']}){{1s+2i+2d<=3}}",
+    "manager_shift_specifier": f"({_description_regex['manager_shift_specifier']}){{1s+1i+1d<=1}}",
+    "is_second_manager": f"({_description_regex['is_second_manager']}){{1s+1i+1d<=1}}",
+    "second_manager_times": f"({_description_regex['second_manager_times']}){{1s+2i+2d<=3}}",
+    #"is_north_south_coord": f"({_description_regex['is_north_south_coord']}){{1s+2i+2d<=3}}",
+    #"north_south_coord_times": f"({_description_regex['north_south_coord_times']}){{1s+2i+2d<=3}}",
+    "mod": f"({_description_regex['mod']}){{1s+1i+1d<=1}}",
+}
+
+# MOD is the only case-sensitive test (otherwise "mod" shows up everywhere)
+_case_sensitive = ("mod",)
+
+
+def _compile(key: str, pattern: str):
+    return re.compile(
+        pattern,
+        re.BESTMATCH if key in _case_sensitive else re.BESTMATCH | re.IGNORECASE,
+    )
+
+
+# Compile everything once per process instead of on every property access
+_fuzzy_patterns = {
+    key: _compile(key, pattern) for key, pattern in _description_patterns_fuzzy.items()
+}
+
+# One alternation covering every role test, used by scan()
+# Time groups are prefixed per role so both roles' times can live in the same pattern
+_scan_tags = ("manager_on", "second_manager", "specifier", "mod")
+_scan_pattern = re.compile(
+    "|".join(
+        [
+            f"(?P<manager_on>{_description_regex['manager_on_times'].replace('(?P<', '(?P<mo_')})",
+            f"(?P<second_manager>{_description_regex['second_manager_times'].replace('(?P<', '(?P<sm_')})",
+            f"(?P<specifier>{_description_regex['manager_shift_specifier']})",
+            f"(?P<mod>(?-i:{_description_regex['mod']}))",
+        ]
+    ),
+    re.IGNORECASE,
+)
+# The negative lookahead from is_second_manager, checked from the start of a second manager match
+_check_in = re.compile(r".*\bcheck in\b", re.IGNORECASE)
+
+
+def _scan_tag(match) -> str:
+    return next(tag for tag in _scan_tags if match.group(tag) is not None)
+
+
+# How often each tier ran; "scan" counts single-pass scans, "exact" counts the roles a scan found
+# without any errors, "fuzzy" counts every fallback to the error budget patterns
+match_stats = collections.Counter()
+
+
+# Result of running every role test against a description
+class DescriptionClass(NamedTuple):
+    is_manager_on: bool
+    is_second_manager: bool
+    is_mod: bool
+    is_specified_shift: bool
+    specified_shift: int  # 0 = first shift, 1 = second shift, 99 = not specified
+    # (start, end) parsed out of the description, None if the description has no times
+    manager_on_times: tuple[datetime.time, datetime.time] | None = None
+    second_manager_times: tuple[datetime.time, datetime.time] | None = None
+
+
+# Bump this whenever the classification or time parsing logic changes
+CACHE_VERSION = 2
+
+# Cached results are only valid for the exact pattern set that produced them
+_PATTERN_SET_HASH = hashlib.sha256(
+    json.dumps([CACHE_VERSION, _description_patterns_fuzzy], sort_keys=True).encode()
+).hexdigest()[:16]
+
+# Shared across runs and processes; the same few hundred descriptions repeat all season
+_persistent_cache = PersistentLRU("descriptions", "description_class", max_entries=2000)
+
+
+# Search with the error budget patterns; scan() only falls back to these for roles it didn't find
+def search(key: str, description: str):
+    match_stats["fuzzy"] += 1
+    return _fuzzy_patterns[key].search(description)
+
+
+# Build time objects from a times match; prefix selects the scanner's per-role group names
+def _match_times(match, prefix: str = "") -> dict:
+    start_time = match.group(f"{prefix}start_time") if match is not None else None
+    end_time = match.group(f"{prefix}end_time") if match is not None else None
+
+    # 2026 shenanigans: if either time is missing, short-circuit description times processing
+    if start_time is None or end_time is None:
+        return {}
+
+    # Create datetime.time objects from the manager on time strings
+    # Strings could be formatted as 8, 8:00, 8:30, 8am, 8:30am, 8:30a, 8:30p, etc.
+    # Match groups are start_time, start_am_pm, end_time, end_am_pm
+
+    start_am_pm = match.group(f"{prefix}start_am_pm") if match is not None else None
+    end_am_pm = match.group(f"{prefix}end_am_pm") if match is not None else None
+
+    if start_time is not None:
+        if start_am_pm is not None:
+            if start_am_pm in ["a", "p"]:
+                start_am_pm = f"{start_am_pm}m"
+            # Sanity check that shouldn't be necessary!
+            # Start time should never be between 0-6am, so if it is, it's probably pm
+            if int(start_time.split(":")[0]) < 6:
+                start_am_pm = "pm"
+            start_time = f"{start_time}{start_am_pm}"
+            start_time = to_time(start_time)
+        else:
+            start_time = to_time(start_time)
+
+    if end_time is not None:
+        if end_am_pm is not None:
+            if end_am_pm in ["a", "p"]:
+                end_am_pm = f"{end_am_pm}m"
+            # Sanity check that shouldn't be necessary!
+            # End time should never be am, except maybe 12am or 1am on a rare occasion
+            if end_am_pm == "am" and int(end_time.split(":")[0]) > 1:
+                end_am_pm = "pm"
+            end_time = f"{end_time}{end_am_pm}"
+            end_time = to_time(end_time)
+        else:
+            end_time = to_time(end_time)
+
+    start_time = start_time or datetime.time(0, 0)
+    end_time = end_time or datetime.time(0, 0)
+
+    return (
+        {
+            "start_time": start_time,
+            "end_time": end_time,
+        }
+        if match is not None
+        else {}
+    )
+
+
+def _times_tuple(times: dict) -> tuple[datetime.time, datetime.time] | None:
+    return (times["start_time"], times["end_time"]) if len(times) > 0 else None
+
+
+# Single pass over the description: every role, its times and the shift specifier in one scan
+# Overlapped matching tries every start position, so e.g. "2nd manager on 3-10" still yields both
+# the second manager and the manager on tags, and the first match per tag is the leftmost one,
+# same as a separate search for each tag would find
+def scan(description: str) -> DescriptionClass:
+    match_stats["scan"] += 1
+
+    found = {}
+    for match in _scan_pattern.finditer(description, overlapped=True):
+        tag = _scan_tag(match)
+        if tag == "second_manager" and "second_manager_flag" not in found:
+            # Second manager check in shifts don't count as the second manager
+            if _check_in.match(description, match.start()) is None:
+                found["second_manager_flag"] = match
+        found.setdefault(tag, match)
+    # A second manager match only counts once it has passed the check in test
+    match_stats["exact"] += sum(
+        tag in found for tag in ("manager_on", "second_manager_flag", "specifier", "mod")
+    )
+
+    # Anything the exact scan missed gets one more chance with the fuzzy patterns
+    manager_on = found.get("manager_on")
+    if manager_on is None and search("is_manager_on", description) is not None:
+        manager_on_times = _match_times(search("manager_on_times", description))
+        is_manager_on = True
+    else:
+        manager_on_times = _match_times(manager_on, "mo_")
+        is_manager_on = manager_on is not None
+
+    second_manager = found.get("second_manager")
+    is_second_manager = (
+        "second_manager_flag" in found
+        or search("is_second_manager", description) is not None
+    )
+    if not is_second_manager:
+        second_manager_times = {}
+    elif second_manager is not None:
+        second_manager_times = _match_times(second_manager, "sm_")
+    else:
+        second_manager_times = _match_times(
+            search("second_manager_times", description)
+        )
+
+    specifier = found.get("specifier")
+    specifier_text = specifier.group("specifier") if specifier is not None else None
+    if specifier is None:
+        specifier = search("manager_shift_specifier", description)
+        specifier_text = specifier.group(1) if specifier is not None else None
+
+    specified_shift = 99
+    if specifier_text is not None:
+        if re.search("first|1st", specifier_text, re.IGNORECASE):
+            specified_shift = 0
+        elif re.search("second|2nd", specifier_text, re.IGNORECASE):
+            specified_shift = 1
+
+    return DescriptionClass(
+        is_manager_on=is_manager_on,
+        is_second_manager=is_second_manager,
+        is_mod="mod" in found or search("mod", description) is not None,
+        is_specified_shift=specifier_text is not None,
+        specified_shift=specified_shift,
+        manager_on_times=_times_tuple(manager_on_times) if is_manager_on else None,
+        second_manager_times=_times_tuple(second_manager_times),
+    )
+
+
+def _dump(result: DescriptionClass) -> dict:
+    dumped = result._asdict()
+    for key in ("manager_on_times", "second_manager_times"):
+        if dumped[key] is not None:
+            dumped[key] = [t.isoformat() for t in dumped[key]]
+    return dumped
+
+
+def _load(dumped: dict) -> DescriptionClass:
+    for key in ("manager_on_times", "second_manager_times"):
+        if dumped[key] is not None:
+            dumped[key] = tuple(datetime.time.fromisoformat(t) for t in dumped[key])
+    return DescriptionClass(**dumped)
+
+
+# Descriptions repeat constantly, so each distinct one is only classified once per process,
+# and a warm on-disk cache means most runs never touch the regexes at all
+@functools.lru_cache(maxsize=4096)
+def classify(description: str) -> DescriptionClass:
+    key = f"{_PATTERN_SET_HASH}:{description}"
+
+    cached = _persistent_cache.get(key)
+    if cached is not None:
+        match_stats["cached"] += 1
+        return _load(cached)
+
+    result = scan(description)
+    _persistent_cache.put(key, _dump(result))
+    return result
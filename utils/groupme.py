@@ -1,6 +1,6 @@
-import json, requests
+import json
 
-from . import cmdline
+from . import clients, cmdline, delivery
 from .config import Config, debug as conf_debug
 
 
@@ -22,57 +22,51 @@ class GroupMe:
         self._a910_bot = a910_bot
         self._north_bot = north_bot
 
-    def post(self, message) -> bool:
-        _bot_id = None
-
-        def _request(data):
-            resp = requests.post(
-                "https://api.groupme.com/v3/bots/post", json.dumps(data)
-            )
-            if self._debug:
-                cmdline.logger(
-                    f"GroupMe response: [Status {resp.status_code} {resp.reason}]",
-                    level="debug",
-                )
-            return True if resp.status_code == 200 else False
-
+    # bot name -> bot id for every bot this instance posts to
+    def _bots(self) -> dict:
+        bots = {}
         if self._dev_bot:
-            _bot_id = self._gmconf.dev_bot_id
-            _message = message["main"] if isinstance(message, dict) else message
-            _request(
-                {
-                    "bot_id": _bot_id,
-                    "text": _message,
-                }
-            )
+            bots["dev"] = self._gmconf.dev_bot_id
         if self._a910_bot:
-            _message = message["a910"] if isinstance(message, dict) else message
-            _request(
-                {
-                    "bot_id": self._gmconf.a910_bot_id,
-                    "text": _message,
-                }
-            )
-
+            bots["a910"] = self._gmconf.a910_bot_id
         if self._north_bot:
-            _message = message["north"] if isinstance(message, dict) else message
-            _request(
-                {
-                    "bot_id": self._gmconf.north_bot_id,
-                    "text": _message,
-                }
+            bots["north"] = self._gmconf.north_bot_id
+        if self._main_bot:
+            bots["main"] = self._gmconf.bot_id
+        return bots
+
+    def _request(self, data: dict, timeout: float | None = None) -> bool:
+        resp = clients.http_session("groupme").post(
+            "https://api.groupme.com/v3/bots/post", json.dumps(data), timeout=timeout
+        )
+        if self._debug:
+            cmdline.logger(
+                f"GroupMe response: [Status {resp.status_code} {resp.reason}]",
+                level="debug",
             )
+        return resp.status_code in (200, 202)
 
-        if self._main_bot:
-            _message = message["main"] if isinstance(message, dict) else message
-            _request(
-                {
-                    "bot_id": self._gmconf.bot_id,
-                    "text": _message,
-                }
+    # One send per bot, for delivery.dispatch; message is a string for every bot,
+    # or a dict with a message per bot ("main" also goes to the dev bot)
+    def senders(self, message, timeout: float | None = delivery.DEFAULT_TIMEOUT) -> dict:
+        def _send(bot_id, text):
+            return lambda: self._request({"bot_id": bot_id, "text": text}, timeout)
+
+        return {
+            bot: _send(
+                bot_id,
+                (
+                    message["main" if bot == "dev" else bot]
+                    if isinstance(message, dict)
+                    else message
+                ),
             )
+            for bot, bot_id in self._bots().items()
+        }
 
-        return True
+    # Posts to every bot at once; returns bot name -> Delivery
+    def post(self, message, timeout: float | None = delivery.DEFAULT_TIMEOUT) -> dict:
+        return delivery.dispatch(self.senders(message, timeout), timeout)
 
 
 # Debug when run from command line
@@ -0,0 +1,66 @@
+import os, queue, threading
+
+from . import cmdline
+
+# Background work queue for things too slow to run inside a web request (GroupMe callbacks)
+# A fixed number of worker threads drain a bounded queue. submit() turns new work away while
+# the queue is full instead of letting it grow without limit, and drops a job whose key is
+# already waiting in the queue, since that one will do the same work
+# A running job doesn't absorb new ones: it may have fetched before the new request came in,
+# so an identical job is queued behind it to get a fresh result
+# Workers start on the first submit, so each forked process (gunicorn worker) gets its own
+
+
+class JobQueue:
+
+    def __init__(self, workers: int = 2, max_queued: int = 16, name: str = "jobs"):
+        self.workers = max(1, int(workers))
+        self.max_queued = max(1, int(max_queued))
+        self._name = name
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._queued: set = set()  # keys waiting for a worker
+
+    def _start(self) -> None:
+        self._queue = queue.Queue(maxsize=self.max_queued)
+        self._queued = set()
+        self._pid = os.getpid()
+        for i in range(self.workers):
+            threading.Thread(
+                target=self._work, name=f"{self._name}-{i}", daemon=True
+            ).start()
+
+    # False if the queue is full; True if the job was queued or an identical one is waiting
+    def submit(self, key, func, *args, **kwargs) -> bool:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start()
+            if key in self._queued:
+                cmdline.logger(f"{self._name}: {key} already queued, coalesced")
+                return True
+            try:
+                self._queue.put_nowait((key, func, args, kwargs))
+            except queue.Full:
+                cmdline.logger(f"{self._name}: queue full, rejected {key}")
+                return False
+            self._queued.add(key)
+            return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queued)
+
+    def _work(self) -> None:
+        jobs = self._queue
+        while True:
+            key, func, args, kwargs = jobs.get()
+            # From here on an identical submit queues a new job instead of joining this one
+            with self._lock:
+                self._queued.discard(key)
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                cmdline.logger(f"{self._name}: {key} failed: {e}")
+            finally:
+                jobs.task_done()
@@ -0,0 +1,35 @@
+import asyncio, functools
+from concurrent.futures import ThreadPoolExecutor
+
+# Runs blocking work (refreshes: W2W/API fetches, scoring, posting) for the async listeners on a
+# bounded thread pool, so the event loop keeps serving heartbeats and other chats meanwhile
+# At most limit calls run at once; callers beyond that wait on the semaphore without blocking the
+# loop, rather than piling up in the executor's queue
+
+DEFAULT_LIMIT = 4
+
+
+class BlockingRunner:
+
+    def __init__(self, limit: int = DEFAULT_LIMIT, name: str = "offload"):
+        self.limit = max(1, int(limit))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.limit, thread_name_prefix=name
+        )
+        self._semaphore = asyncio.Semaphore(self.limit)
+
+    async def run(self, func, *args, **kwargs):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Concurrency limit for a listener from the config's listeners section
+def concurrency_limit(config) -> int:
+    section = config.get("listeners") or {}
+    return section.get("max_concurrent_refreshes") or DEFAULT_LIMIT
@@ -0,0 +1,82 @@
+import regex as re
+from typing import TYPE_CHECKING
+
+# Only for annotations; clients.supabase_client imports supabase when a client is first needed
+if TYPE_CHECKING:
+    from supabase import Client as SupabaseClient
+
+from . import cmdline, clients
+from .config import Config
+from .w2w import Shift
+
+# Only the columns Shift needs
+_shift_columns = (
+    "first_name",
+    "last_name",
+    "start_ts",
+    "end_ts",
+    "duration_hours",
+    "description",
+    "position_id",
+)
+
+
+def normalize_name(string: str) -> str:
+    # Remove from the first occurrence of '(' to the end of the string in last names
+    string = re.sub(r"\(.*$", "", string)
+    # Remove extra whitespace
+    return string.strip()
+
+
+class RidesAPI:
+
+    def __init__(self, config: Config, debug: bool = False):
+        self._apiconf = config
+        self._debug = debug
+        self._client: "SupabaseClient" = clients.supabase_client(config)
+
+    # Retrieve the schedule for a day for every filter in one request
+    # Filters should be a list of (label, position id) tuples, returns {label: shifts}
+    def retrieve_schedules(self, filters: list[tuple], date: str) -> dict:
+        rows = (
+            self._client.schema("ops")
+            .table("schedule_shift")
+            .select(",".join(_shift_columns))
+            .eq("local_date", date)
+            .in_("position_id", [filter[1] for filter in filters])
+            .execute()
+            .data
+        )
+
+        if self._debug:
+            cmdline.logger(
+                f"Retrieved {len(rows)} shifts for {len(filters)} filters",
+                level="debug",
+            )
+
+        # Partition the rows by position, a position could be listed under more than one filter
+        labels_by_position: dict = {}
+        for label, position_id in filters:
+            labels_by_position.setdefault(str(position_id), []).append(label)
+
+        shifts = {filter[0]: [] for filter in filters}
+        for row in rows:
+            for label in labels_by_position.get(str(row["position_id"]), []):
+                # Each filter gets its own Shift, shift_logic adjusts role times in place
+                shifts[label].append(self._to_shift(row))
+
+        return shifts
+
+    def _to_shift(self, row: dict) -> Shift:
+        return Shift(
+            employee=normalize_name(row["first_name"] + " " + row["last_name"]),
+            start_time=row["start_ts"],
+            end_time=row["end_ts"],
+            total_hours=row["duration_hours"],
+            description=row["description"],
+            pos_id=row["position_id"],
+        )
+
+    @property
+    def client(self) -> "SupabaseClient":
+        return self._client
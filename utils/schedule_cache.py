@@ -0,0 +1,63 @@
+import threading, time
+
+from . import cmdline
+
+
+# Stale-while-revalidate cache for computed days
+# Fresh entries (younger than ttl) are served as is. Stale entries are served straight away while
+# a single background thread recomputes them; entries older than max_stale are recomputed inline.
+class ScheduleCache:
+
+    def __init__(self):
+        self._entries: dict = {}  # key -> (computed_at, value)
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute, ttl: float = 60, max_stale: float = 900):
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age <= ttl:
+                return entry[1]
+            if age <= max_stale:
+                self._refresh_in_background(key, compute)
+                return entry[1]
+
+        return self._compute(key, compute)
+
+    def invalidate(self, key=None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _compute(self, key, compute):
+        value = compute()
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def _refresh_in_background(self, key, compute) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _run():
+            try:
+                self._compute(key, compute)
+            except Exception as e:
+                # Keep serving the stale entry, the next request will try again
+                cmdline.logger(f"Background refresh of {key} failed: {e}", level="info")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+
+# One cache per process, shared by every front-end running in it
+schedule_cache = ScheduleCache()
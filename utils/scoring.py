@@ -0,0 +1,184 @@
+import datetime, functools, hashlib, json
+from typing import NamedTuple
+import numpy as np
+
+from .w2w import Shift
+
+
+# Batched shift_logic.determine_shift(match_multiple=True)
+# Scores every candidate against every meta shift in one NumPy evaluation instead of one Python
+# call per pair; score_matrix(...)[i, j] is determine_shift's score for candidate j in window i
+
+# Rule table: feature -> weight, in the order the evaluator lays the features out
+# Variance and mislabel features are in hours, the rest are 0/1
+# Any of these can be overridden from the scoring section of config.yaml
+DEFAULT_WEIGHTS = {
+    "manager_on_variance": -10,  # description manager on times vs the meta shift
+    "second_manager_variance": -10,  # description second manager times vs the meta shift
+    "mod_variance": -30,  # MOD times vs the meta shift
+    "exact_description_times": 100,  # description times match the meta shift exactly
+    "start_window": 200,  # shift start within the meta shift's start window
+    "end_window": 200,  # shift end within tolerance of the meta shift end
+    "start_mislabel": -10,  # shift start outside tolerance of the meta shift start
+    "end_mislabel": -10,  # shift end outside tolerance of the meta shift end
+    "near_end": -1500,  # shift starts right before the meta shift ends (disqualifies)
+    "specified_shift": 500,  # description names the shift, e.g. "1st shift"
+}
+
+# Hours of slack for the window tests
+DEFAULT_TOLERANCES = {
+    "start": 2,  # start window before noon, also the start mislabel test
+    "start_afternoon": 3,  # start window for meta shifts starting 12-6pm
+    "start_evening": 5,  # start window for meta shifts starting after 6pm (trainings)
+    "end": 2,  # end window and end mislabel test
+    "near_end": 2,
+}
+
+# Every candidate scores this on days with a single shift
+DEFAULT_SINGLE_SHIFT_SCORE = 100
+
+_features = tuple(DEFAULT_WEIGHTS)
+_variance_features = _features.index("exact_description_times")  # features before this are role variances
+_specified_feature = _features.index("specified_shift")
+
+_role_attrs = (
+    ("manager_start", "manager_end"),
+    ("second_manager_start", "second_manager_end"),
+    ("mod_start", "mod_end"),
+)
+
+
+# The rule table compiled into a weight vector
+class ScoringRules(NamedTuple):
+    weights: np.ndarray
+    tolerances: dict
+    single_shift_score: int
+    fingerprint: str  # changes whenever any rule does
+
+
+@functools.lru_cache(maxsize=16)
+def _compile(section: str) -> ScoringRules:
+    section = json.loads(section)
+
+    weights = dict(DEFAULT_WEIGHTS)
+    tolerances = dict(DEFAULT_TOLERANCES)
+    for name, table in (("weights", weights), ("tolerances", tolerances)):
+        for rule, value in (section.get(name) or {}).items():
+            if rule not in table:
+                raise ValueError(f"Unknown scoring rule in {name}: {rule}")
+            if value is not None:
+                table[rule] = int(value)
+
+    single_shift_score = section.get("single_shift_score")
+    if single_shift_score is None:
+        single_shift_score = DEFAULT_SINGLE_SHIFT_SCORE
+
+    return ScoringRules(
+        weights=np.array([weights[feature] for feature in _features], dtype=np.int64),
+        tolerances=tolerances,
+        single_shift_score=int(single_shift_score),
+        fingerprint=hashlib.sha256(
+            json.dumps([weights, tolerances, single_shift_score], sort_keys=True).encode()
+        ).hexdigest()[:16],
+    )
+
+
+# Rules from the config's scoring section (all optional) on top of the defaults
+# Compiled once per distinct section
+def load_rules(config=None) -> ScoringRules:
+    section = (config.get("scoring") if config is not None else None) or {}
+    return _compile(json.dumps(section, sort_keys=True))
+
+
+# Hours of a time attribute across the candidates, plus a mask of which candidates have it
+def _hours(shifts: list[Shift], attr: str) -> tuple[np.ndarray, np.ndarray]:
+    times = [getattr(shift, attr) for shift in shifts]
+    return (
+        np.array([t.hour if t is not None else 0 for t in times], dtype=np.int64),
+        np.array([t is not None for t in times], dtype=bool),
+    )
+
+
+# Feature tensor of shape (windows, candidates, features), already gated so that features @ weights
+# is the score: specified shifts keep only their variances, unidentified candidates keep nothing
+def features(
+    shifts: list[Shift],
+    windows: list[tuple[int, datetime.time, datetime.time]],
+    tolerances: dict,
+) -> np.ndarray:
+    shift_ids = np.array([window[0] for window in windows], dtype=np.int64)[:, None]
+    m_start = np.array([window[1].hour for window in windows], dtype=np.int64)[:, None]
+    m_end = np.array([window[2].hour for window in windows], dtype=np.int64)[:, None]
+
+    start, _ = _hours(shifts, "start_time")
+    end, _ = _hours(shifts, "end_time")
+
+    shape = (len(windows), len(shifts))
+    values = np.zeros(shape + (len(_features),), dtype=np.int64)
+
+    # Variance between the description times and the meta shift, per role
+    time_in_desc = np.zeros(len(shifts), dtype=bool)
+    for role, (start_attr, end_attr) in enumerate(_role_attrs):
+        role_start, has_start = _hours(shifts, start_attr)
+        role_end, has_end = _hours(shifts, end_attr)
+        values[..., role] = (
+            np.abs(role_start - m_start) * has_start + np.abs(role_end - m_end) * has_end
+        )
+        # MOD times don't count as times in the description
+        if role < 2:
+            time_in_desc |= has_start | has_end
+
+    variance = values[..., :_variance_features].sum(axis=-1)
+    values[..., _features.index("exact_description_times")] = time_in_desc & (variance == 0)
+
+    start_gap = np.abs(start - m_start)
+    end_gap = np.abs(end - m_end)
+
+    # Start window; the allowed variance widens for later meta shifts
+    start_tolerance = np.select(
+        [m_start < 12, m_start < 18],
+        [tolerances["start"], tolerances["start_afternoon"]],
+        tolerances["start_evening"],
+    )
+    start_match = start_gap <= start_tolerance
+    values[..., _features.index("start_window")] = start_match
+
+    # With match_multiple, the end and mislabeled description checks only apply to the first two shifts
+    first_two = np.broadcast_to((shift_ids == 0) | (shift_ids == 1), shape)
+    values[..., _features.index("end_window")] = first_two & (end_gap <= tolerances["end"])
+    values[..., _features.index("start_mislabel")] = (
+        first_two * (start_gap > tolerances["start"]) * start_gap
+    )
+    values[..., _features.index("end_mislabel")] = (
+        first_two * (end_gap > tolerances["end"]) * end_gap
+    )
+    values[..., _features.index("near_end")] = (
+        np.abs(start - m_end) <= tolerances["near_end"]
+    )
+
+    # A specified shift skips everything but the description time variance,
+    # and candidates nothing identified a shift for score 0
+    specified = np.array(
+        [shift.description_class.is_specified_shift for shift in shifts], dtype=bool
+    )
+    identified = start_match | first_two
+    values[..., :_variance_features] *= (specified | identified)[..., None]
+    values[..., _variance_features:] *= (~specified & identified)[..., None]
+    values[..., _specified_feature] = np.broadcast_to(specified, shape)
+
+    return values
+
+
+def score_matrix(
+    day_meta: dict,
+    shifts: list[Shift],
+    windows: list[tuple[int, datetime.time, datetime.time]],
+    rules: ScoringRules | None = None,
+) -> np.ndarray:
+    # windows are (meta shift id, start, end)
+    rules = rules or load_rules()
+
+    if day_meta["detected_shifts"] == 1:
+        return np.full((len(windows), len(shifts)), rules.single_shift_score, dtype=np.int64)
+
+    return features(shifts, windows, rules.tolerances) @ rules.weights
@@ -36,27 +36,27 @@ def determine_shift(
         _tmp_score = score
         _tmp_time_in_desc = False
 
-        if hasattr(shift, "_manager_start"):
-            score -= get_variance(shift._manager_start, m_start) * 10
+        if shift.manager_start is not None:
+            score -= get_variance(shift.manager_start, m_start) * 10
             _tmp_time_in_desc = True
-        if hasattr(shift, "_manager_end"):
-            score -= get_variance(shift._manager_end, m_end) * 10
+        if shift.manager_end is not None:
+            score -= get_variance(shift.manager_end, m_end) * 10
             _tmp_time_in_desc = True
 
-        if hasattr(shift, "_second_manager_start"):
-            score -= get_variance(shift._second_manager_start, m_start) * 10
+        if shift.second_manager_start is not None:
+            score -= get_variance(shift.second_manager_start, m_start) * 10
             _tmp_time_in_desc = True
-        if hasattr(shift, "_second_manager_end"):
-            score -= get_variance(shift._second_manager_end, m_end) * 10
+        if shift.second_manager_end is not None:
+            score -= get_variance(shift.second_manager_end, m_end) * 10
             _tmp_time_in_desc = True
 
-        if hasattr(shift, "_mod_start"):
-            score -= get_variance(shift._mod_start, m_start) * 30
-        if hasattr(shift, "_mod_end"):
-            score -= get_variance(shift._mod_end, m_end) * 30
+        if shift.mod_start is not None:
+            score -= get_variance(shift.mod_start, m_start) * 30
+        if shift.mod_end is not None:
+            score -= get_variance(shift.mod_end, m_end) * 30
 
-        if hasattr(shift, "is_specified_shift") and shift.is_specified_shift:
-            return (shift.specified_shift, m_start, m_end, score + 500, shift)
+        if shift.description_class.is_specified_shift:
+            return (shift.description_class.specified_shift, m_start, m_end, score + 500, shift)
 
         #if hasattr(shift, "_north_south_coord_start"):
         #    score -= get_variance(shift._north_south_coord_start, m_start) * 10
@@ -0,0 +1,87 @@
+import fcntl, hashlib, pickle, sqlite3, time
+
+from . import cmdline, state
+
+# Results older than this are cleared out whenever a new one is stored
+_RESULT_RETENTION = 24 * 60 * 60
+
+# Seconds a caller waits for another process's computation before doing it itself
+DEFAULT_WAIT = 60
+_POLL_INTERVAL = 0.1
+
+
+def _connect() -> sqlite3.Connection:
+    conn = state.connect("singleflight")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS results ("
+        "key TEXT PRIMARY KEY, completed_at REAL NOT NULL, value BLOB NOT NULL)"
+    )
+    return conn
+
+
+def _load_since(key: str, since: float):
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT value FROM results WHERE key = ? AND completed_at >= ?",
+            (key, since),
+        ).fetchone()
+    finally:
+        conn.close()
+    return (True, pickle.loads(row[0])) if row is not None else (False, None)
+
+
+def _store(key: str, value) -> None:
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, completed_at, value) VALUES (?, ?, ?)",
+            (key, now, pickle.dumps(value)),
+        )
+        conn.execute(
+            "DELETE FROM results WHERE completed_at < ?", (now - _RESULT_RETENTION,)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# Cross-process single-flight: the first caller for a key computes it while every other caller
+# (in any rides-bot process) waits on the key's file lock, then picks up the result that finished
+# after it started waiting instead of computing it again
+# The lock is released by the kernel if the computing process dies; a computation that hangs
+# instead only holds the others up for wait seconds, after which they compute it themselves
+def run(key: str, compute, wait: float = DEFAULT_WAIT):
+    started = time.time()
+
+    lock_dir = state.STATE_DIR / "locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    lock_path = lock_dir / f"{hashlib.sha256(key.encode()).hexdigest()[:32]}.lock"
+
+    with open(lock_path, "a+") as lock_file:
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    cmdline.logger(
+                        f"Still waiting on {key} after {wait:.0f}s, computing it here"
+                    )
+                    value = compute()
+                    _store(key, value)
+                    return value
+                time.sleep(_POLL_INTERVAL)
+
+        try:
+            found, value = _load_since(key, started)
+            if found:
+                return value
+
+            value = compute()
+            _store(key, value)
+            return value
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,180 @@
+import datetime, json, os, pickle, sqlite3, threading, time
+from typing import NamedTuple
+
+from . import state
+from .nested_json import NestedJSONEncoder
+
+# Every fetched day and what it computed to, shared by every process
+# Keeps the raw shift rows (and the parsed Shift fields) next to operating_day_meta and the
+# rendered messages, so past dates can be answered without going back to W2W or the API
+
+
+# One stored day; value is whatever the pipeline stored as its result, unpickled
+class Snapshot(NamedTuple):
+    date: datetime.date
+    source: str
+    digest: str
+    fetched_at: datetime.datetime
+    value: object
+
+
+_schema = (
+    "CREATE TABLE IF NOT EXISTS days ("
+    "date TEXT NOT NULL, source TEXT NOT NULL, digest TEXT NOT NULL, "
+    "version TEXT NOT NULL, fetched_at TEXT NOT NULL, computed_at REAL NOT NULL, "
+    "operating_day_meta TEXT, messages TEXT, value BLOB NOT NULL, "
+    "PRIMARY KEY (date, source))",
+    "CREATE TABLE IF NOT EXISTS shifts ("
+    "date TEXT NOT NULL, source TEXT NOT NULL, label TEXT NOT NULL, "
+    "row_number INTEGER NOT NULL, pos_id TEXT, employee TEXT NOT NULL, "
+    "start_time_raw TEXT, end_time_raw TEXT, total_hours_raw TEXT, description TEXT, "
+    "start_time TEXT, end_time TEXT, total_hours REAL, parsed TEXT, "
+    "PRIMARY KEY (date, source, label, row_number))",
+    "CREATE INDEX IF NOT EXISTS shifts_position ON shifts (date, source, pos_id)",
+    "CREATE INDEX IF NOT EXISTS shifts_employee ON shifts (employee, date)",
+)
+
+
+# Any sqlite error is treated as a miss (or a skipped write), same as the other state stores
+class SnapshotStore:
+
+    def __init__(self, name: str = "snapshots"):
+        self._name = name
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    # Connections don't survive a fork, so reconnect whenever the pid changes
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = state.connect(self._name)
+            self._pid = os.getpid()
+            for statement in _schema:
+                self._conn.execute(statement)
+            self._conn.commit()
+        return self._conn
+
+    def _get(self, query: str, params: tuple) -> Snapshot | None:
+        with self._lock:
+            try:
+                row = self._connection().execute(query, params).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None:
+            return None
+        return Snapshot(
+            date=datetime.date.fromisoformat(row[0]),
+            source=row[1],
+            digest=row[2],
+            fetched_at=datetime.datetime.fromisoformat(row[3]),
+            value=pickle.loads(row[4]),
+        )
+
+    # The stored day, only if it was computed from the shifts with this digest
+    def get(self, date: datetime.date, source: str, digest: str) -> Snapshot | None:
+        return self._get(
+            "SELECT date, source, digest, fetched_at, value FROM days "
+            "WHERE date = ? AND source = ? AND digest = ?",
+            (date.isoformat(), source, digest),
+        )
+
+    # The last stored day, whatever shifts it was computed from, as long as the code that
+    # computed it (version) is still the same
+    def latest(self, date: datetime.date, source: str, version: str) -> Snapshot | None:
+        return self._get(
+            "SELECT date, source, digest, fetched_at, value FROM days "
+            "WHERE date = ? AND source = ? AND version = ?",
+            (date.isoformat(), source, version),
+        )
+
+    # A fetch came back with the same digest: the stored day is current as of fetched_at
+    def touch(
+        self, date: datetime.date, source: str, digest: str, fetched_at: datetime.datetime
+    ) -> None:
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "UPDATE days SET fetched_at = ? "
+                        "WHERE date = ? AND source = ? AND digest = ? AND fetched_at < ?",
+                        (
+                            fetched_at.isoformat(),
+                            date.isoformat(),
+                            source,
+                            digest,
+                            fetched_at.isoformat(),
+                        ),
+                    )
+            except sqlite3.Error:
+                pass
+
+    # Replace the stored day with a new fetch and its result
+    # shifts is filter label -> list[Shift]
+    def put(
+        self,
+        date: datetime.date,
+        source: str,
+        digest: str,
+        version: str,
+        fetched_at: datetime.datetime,
+        shifts: dict,
+        value,
+        operating_day_meta: dict | None = None,
+        messages: dict | None = None,
+    ) -> None:
+        day = (date.isoformat(), source)
+        shift_rows = [
+            day
+            + (
+                label,
+                row_number,
+                str(shift.pos_id),
+                str(shift.employee),
+                str(shift._start_time_str),
+                str(shift._end_time_str),
+                str(shift._total_hours_str),
+                shift.description,
+                shift.start_time.isoformat(),
+                shift.end_time.isoformat(),
+                shift.total_hours,
+                json.dumps(shift.to_dict, cls=NestedJSONEncoder),
+            )
+            for label, label_shifts in shifts.items()
+            for row_number, shift in enumerate(label_shifts)
+        ]
+
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO days (date, source, digest, version, "
+                        "fetched_at, computed_at, operating_day_meta, messages, value) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        day
+                        + (
+                            digest,
+                            version,
+                            fetched_at.isoformat(),
+                            time.time(),
+                            json.dumps(operating_day_meta, cls=NestedJSONEncoder),
+                            json.dumps(messages),
+                            pickle.dumps(value),
+                        ),
+                    )
+                    conn.execute(
+                        "DELETE FROM shifts WHERE date = ? AND source = ?", day
+                    )
+                    conn.executemany(
+                        "INSERT INTO shifts (date, source, label, row_number, pos_id, "
+                        "employee, start_time_raw, end_time_raw, total_hours_raw, "
+                        "description, start_time, end_time, total_hours, parsed) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        shift_rows,
+                    )
+            except sqlite3.Error:
+                pass
+
+
+snapshot_store = SnapshotStore()
@@ -0,0 +1,81 @@
+import json, os, sqlite3, threading, time
+from pathlib import Path
+
+# Local state shared by every rides-bot process (gunicorn workers and both listeners)
+STATE_DIR = (Path(__file__).parent.parent / "state").resolve()
+
+
+def connect(name: str) -> sqlite3.Connection:
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        STATE_DIR / f"{name}.sqlite3", timeout=30, check_same_thread=False
+    )
+    # WAL lets readers in other processes carry on while one process writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+# A small key -> JSON value table with least recently used eviction
+# Any sqlite error is treated as a cache miss, the cache should never take the bot down
+class PersistentLRU:
+
+    def __init__(self, name: str, table: str, max_entries: int = 2000):
+        self._name = name
+        self._table = table
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    # Connections don't survive a fork, so reconnect whenever the pid changes
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = connect(self._name)
+            self._pid = os.getpid()
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self._table}_last_used "
+                f"ON {self._table} (last_used)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str):
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    f"SELECT value FROM {self._table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    f"UPDATE {self._table} SET last_used = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+                conn.commit()
+                return json.loads(row[0])
+            except sqlite3.Error:
+                return None
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self._table} (key, value, last_used) "
+                    "VALUES (?, ?, ?)",
+                    (key, json.dumps(value), time.time()),
+                )
+                conn.execute(
+                    f"DELETE FROM {self._table} WHERE key NOT IN ("
+                    f"SELECT key FROM {self._table} ORDER BY last_used DESC LIMIT ?)",
+                    (self._max_entries,),
+                )
+                conn.commit()
+            except sqlite3.Error:
+                pass
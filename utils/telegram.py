@@ -1,7 +1,25 @@
-from . import cmdline
+from . import clients, cmdline
 from .config import Config, debug as conf_debug
 
-import telegram, asyncio
+import telegram, asyncio, os, threading
+
+# Synchronous sends all run on one event loop per process, on its own thread, instead of a fresh
+# loop from asyncio.run every time; the bot's HTTP client (and its connections) live on that loop
+_loop = None
+_loop_lock = threading.Lock()
+_loop_pid = None
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(
+                target=_loop.run_forever, name="telegram-loop", daemon=True
+            ).start()
+        return _loop
 
 
 class TelegramBot:
@@ -9,7 +27,7 @@ class TelegramBot:
         self.conf = conf
         self.token = conf.telegram.token
         self.a12_chat_id = conf.telegram.a12_chat_id
-        self.bot = telegram.Bot(self.token)
+        self.bot = clients.telegram_bot(self.token)
 
     async def send_message(self, message: str, chat_id: int = None) -> bool:
         chat_id = chat_id if chat_id is not None else self.a12_chat_id
@@ -21,5 +39,12 @@ class TelegramBot:
             cmdline.logger(f"Telegram error: {e}", level="error")
             return False
 
-    def send(self, *args, **kwargs):
-        return asyncio.run(self.send_message(*args, **kwargs))
+    def send(self, *args, timeout: float | None = None, **kwargs):
+        future = asyncio.run_coroutine_threadsafe(
+            self.send_message(*args, **kwargs), _event_loop()
+        )
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
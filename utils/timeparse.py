@@ -0,0 +1,73 @@
+import datetime, functools, regex as re
+
+
+# W2W times, e.g. 3pm, 11:30am, 8:00 (same hour/minute ranges strptime's %I and %M accept)
+_twelve_hour = re.compile(
+    r"(?P<hour>1[0-2]|0[1-9]|[1-9])(?::(?P<minute>[0-5][0-9]|[0-9]))?(?P<am_pm>am|pm)?",
+    re.IGNORECASE,
+)
+# Rides API timestamptz, e.g. 2026-05-30T14:00:00+00:00
+_timestamptz = re.compile(
+    r"(?P<year>[0-9]{4})-(?P<month>[0-9]{2})-(?P<day>[0-9]{2})"
+    r"T(?P<hour>[0-9]{2}):(?P<minute>[0-9]{2}):(?P<second>[0-9]{2})"
+    r"(?:(?P<sign>[+-])(?P<tz_hour>[0-9]{2}):?(?P<tz_minute>[0-9]{2})|Z)"
+)
+
+
+# Change a W2W or Rides API time string to a time object
+# The set of distinct time strings in a season is tiny, so every result is memoized
+@functools.lru_cache(maxsize=1024)
+def to_time(time_str: str) -> datetime.time:
+    match = _twelve_hour.fullmatch(time_str)
+    if match is not None and (match.group("minute") or match.group("am_pm")):
+        hour = int(match.group("hour"))
+        minute = int(match.group("minute") or 0)
+        am_pm = (match.group("am_pm") or "am").lower()
+
+        # Same as strptime: 12am (or 12:xx without am/pm) is midnight, 12pm is noon
+        if hour == 12:
+            hour = 0
+        if am_pm == "pm":
+            hour += 12
+        return datetime.time(hour, minute)
+
+    match = _timestamptz.fullmatch(time_str)
+    if match is not None:
+        offset = datetime.timedelta(0)
+        if match.group("sign") is not None:
+            offset = datetime.timedelta(
+                hours=int(match.group("tz_hour")), minutes=int(match.group("tz_minute"))
+            )
+            if match.group("sign") == "-":
+                offset = -offset
+        # Convert to local time
+        return (
+            datetime.datetime(
+                *(int(match.group(key)) for key in ("year", "month", "day", "hour", "minute", "second")),
+                tzinfo=datetime.timezone(offset),
+            )
+            .astimezone()
+            .time()
+        )
+
+    return _to_time_strptime(time_str)
+
+
+# Anything the fast paths don't recognize goes through the original format loop,
+# which also raises the same ValueError for strings nothing can parse
+def _to_time_strptime(time_str: str) -> datetime.time:
+    formats = [
+        "%I%p",  # e.g. 3pm
+        "%I:%M%p",  # e.g. 11:30am
+        "%I:%M",  # e.g. 8:00
+    ]
+    timestamptz: str = "%Y-%m-%dT%H:%M:%S%z"
+
+    for format in formats:
+        try:
+            return datetime.datetime.strptime(time_str, format).time()
+        except ValueError:
+            pass
+
+    # Use timestamptz format and convert to local time
+    return datetime.datetime.strptime(time_str, timestamptz).astimezone().time()
@@ -1,8 +1,11 @@
-import datetime, json, regex as re
+import datetime, json, threading, time, regex as re
+from typing import NamedTuple
 import requests, requests.cookies, requests.utils, html
+from concurrent.futures import ThreadPoolExecutor
 
-from . import cmdline
+from . import clients, cmdline, descriptions
 from .nested_json import NestedJSONEncoder
+from .timeparse import to_time
 from .config import Config, debug as conf_debug
 
 
@@ -12,8 +15,40 @@ class Employee:
         self.name = name
 
 
+# Derived from the start/end times, worked out the first time any of them is needed
+class _ShiftTimes(NamedTuple):
+    start_am_pm: str
+    end_am_pm: str
+    is_am_shift: bool
+    is_pm_shift: bool
+    is_double_shift: bool
+
+
+# (start, end) for each role the shift has, None for roles it doesn't
+class _RoleTimes(NamedTuple):
+    manager_on: tuple[datetime.time, datetime.time] | None
+    second_manager: tuple[datetime.time, datetime.time] | None
+    mod: tuple[datetime.time, datetime.time] | None
+
+
 class Shift:
 
+    # Fixed layout; a season of days is a lot of shifts to keep around
+    __slots__ = (
+        "employee",
+        "start_time",
+        "end_time",
+        "total_hours",
+        "description",
+        "pos_id",
+        "description_class",
+        "_start_time_str",
+        "_end_time_str",
+        "_total_hours_str",
+        "_times",
+        "_roles",
+    )
+
     def __init__(
         self,
         employee: Employee | str,
@@ -33,29 +68,12 @@ class Shift:
         self.description = description
         self.pos_id = pos_id
 
-        if self.is_manager_on:
-            times = self._get_manager_on_times()
-            if len(times) > 0:
-                self._manager_start = times["start_time"]
-                self._manager_end = times["end_time"]
-            else:
-                self._manager_start = self.start_time
-                self._manager_end = self.end_time
+        # Scan the description once; the role properties read from this
+        self.description_class = descriptions.classify(description)
 
-        if self.is_second_manager:
-            times = self._get_description_times(
-                "second_manager_times", self.is_second_manager
-            )
-            if len(times) > 0:
-                self._second_manager_start = times["start_time"]
-                self._second_manager_end = times["end_time"]
-            else:
-                self._second_manager_start = self.start_time
-                self._second_manager_end = self.end_time
-
-        if self.is_mod:
-            self._mod_start = self.start_time
-            self._mod_end = self.end_time
+        # Computed on first use
+        self._times: _ShiftTimes | None = None
+        self._roles: _RoleTimes | None = None
 
         #if self.is_north_south_coord:
         #    times = self._get_description_times(
@@ -108,178 +126,133 @@ class Shift:
 
     # Internal method to change W2W time to a time object
     def _to_time(self, time_str: str) -> datetime.time:
-        formats = [
-            "%I%p",  # e.g. 3pm
-            "%I:%M%p",  # e.g. 11:30am
-            "%I:%M",  # e.g. 8:00
-            
-        ]
-        timestamptz: str = "%Y-%m-%dT%H:%M:%S%z"
-
-        # Set the default time to midnight and try all the formats
-        time_obj: datetime.time = datetime.time(0, 0)
-        matched: bool = False
-        for format in formats:
-            try:
-                time_obj = datetime.datetime.strptime(time_str, format).time()
-                matched = True
-            except ValueError:
-                pass
-        if not matched:
-            # Use timestamptz format and convert to local time
-            time_obj = datetime.datetime.strptime(time_str, timestamptz).astimezone().time()
-
-        return time_obj
-
-    # Hold the regex for our description filters
-    def _description_regex(self, key: str):
-        description_regex = {
-            "is_manager_on": r"(?:manager taking calls|manager on)",
-            "manager_on_times": r"(?:manager taking calls|manager on)(?:\sfrom\s|:\s?|\s?[-]\s?|\s{1,2})?(?P<start_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<start_am_pm>am|pm|a|p?)?(?:\s?[-]\s?|\s?to\s?)?(?P<end_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<end_am_pm>am|pm|a|p?)?",
-            "manager_shift_specifier": r"(?:1st shift|2nd shift|first shift|second shift)",
-            "is_second_manager": r"(?!.*\bcheck in\b)(?:second manager|2nd manager)",
-            "second_manager_times": r"(?:second manager|2nd manager)(?:\sfrom\s|:\s?|\s?[-]\s?|\s{1,2})?(?P<start_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<start_am_pm>am|pm|a|p?)?(?:\s?[-]\s?|\s?to\s?)?(?P<end_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<end_am_pm>am|pm|a|p?)?",
-            #"is_north_south_coord": r"^(?<!(?:shadow\s))(?:wwns\s?-?\s?)?(?P<which>north|south)(\s?(?=coord|coordinator))",
-            #"north_south_coord_times": r"^(?<!(?:shadow\s))(?:wwns\s?-?\s?)?(?P<which>north|south)(\s?(?=coord|coordinator))(?:coord|coordinator)?(?:\sfrom\s|:\s?|\s?[-]\s?|\s{1,2})?(?P<start_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<start_am_pm>am|pm|a|p?)?(?:\s?[-]\s?|\s?to\s?)?(?P<end_time>[0-9]{1,2}:?[0-9]{0,2})?(?P<end_am_pm>am|pm|a|p?)?",
-            "mod": r"(?:MOD)",
-        }
-        _description_patterns_fuzzy = {
-            "is_manager_on": f"({description_regex['is_manager_on']}){{3s+1i<=1}}",
-            "manager_on_times": f"({description_regex['manager_on_times']}){{1s+2i+2d<=3}}",
-            "manager_shift_specifier": f"({description_regex['manager_shift_specifier']}){{1s+1i+1d<=1}}",
-            "is_second_manager": f"({description_regex['is_second_manager']}){{1s+1i+1d<=1}}",
-            "second_manager_times": f"({description_regex['second_manager_times']}){{1s+2i+2d<=3}}",
-            #"is_north_south_coord": f"({description_regex['is_north_south_coord']}){{1s+2i+2d<=3}}",
-            #"north_south_coord_times": f"({description_regex['north_south_coord_times']}){{1s+2i+2d<=3}}",
-            "mod": f"({description_regex['mod']}){{1s+1i+1d<=1}}",
-        }
-        return _description_patterns_fuzzy[key]
+        return to_time(time_str)
 
     def _get_manager_on_times(self) -> dict:
         return self._get_description_times("manager_on_times", self.is_manager_on)
 
     def _get_description_times(self, regex, test) -> dict:
-        match = (
-            re.search(
-                self._description_regex(regex),
-                self.description,
-                re.BESTMATCH | re.IGNORECASE,
-            )
-            if test
-            else None
-        )
-        start_time = match.group("start_time") if match is not None else None
-        end_time = match.group("end_time") if match is not None else None
-
-        # 2026 shenanigans: if either time is missing, short-circuit description times processing
-        if start_time is None or end_time is None:
+        times = getattr(self.description_class, regex) if test else None
+        if times is None:
             return {}
-
-        # Create datetime.time objects from the manager on time strings
-        # Strings could be formatted as 8, 8:00, 8:30, 8am, 8:30am, 8:30a, 8:30p, etc.
-        # Match groups are start_time, start_am_pm, end_time, end_am_pm
-
-        start_am_pm = match.group("start_am_pm") if match is not None else None
-        end_am_pm = match.group("end_am_pm") if match is not None else None
-
-        if start_time is not None:
-            if start_am_pm is not None:
-                if start_am_pm in ["a", "p"]:
-                    start_am_pm = f"{start_am_pm}m"
-                # Sanity check that shouldn't be necessary!
-                # Start time should never be between 0-6am, so if it is, it's probably pm
-                if int(start_time.split(":")[0]) < 6:
-                    start_am_pm = "pm"
-                start_time = f"{start_time}{start_am_pm}"
-                start_time = self._to_time(start_time)
-            else:
-                start_time = self._to_time(start_time)
-
-        if end_time is not None:
-            if end_am_pm is not None:
-                if end_am_pm in ["a", "p"]:
-                    end_am_pm = f"{end_am_pm}m"
-                # Sanity check that shouldn't be necessary!
-                # End time should never be am, except maybe 12am or 1am on a rare occasion
-                if end_am_pm == "am" and int(end_time.split(":")[0]) > 1:
-                    end_am_pm = "pm"
-                end_time = f"{end_time}{end_am_pm}"
-                end_time = self._to_time(end_time)
-            else:
-                end_time = self._to_time(end_time)
-
-        start_time = start_time or datetime.time(0, 0)
-        end_time = end_time or datetime.time(0, 0)
-
-        return (
-            {
-                "start_time": start_time,
-                "end_time": end_time,
-            }
-            if match is not None
-            else {}
-        )
+        return {
+            "start_time": times[0],
+            "end_time": times[1],
+        }
 
     @property
     def to_dict(self):
         return dict(self)
 
+    @property
+    def shift_times(self) -> _ShiftTimes:
+        if self._times is None:
+            start_am_pm = "am" if self.start_time.hour < 12 else "pm"
+            is_am_shift = start_am_pm == "am"
+            is_pm_shift = start_am_pm == "pm" or self.end_time.hour >= 17
+            self._times = _ShiftTimes(
+                start_am_pm=start_am_pm,
+                end_am_pm="am" if self.end_time.hour < 12 else "pm",
+                is_am_shift=is_am_shift,
+                is_pm_shift=is_pm_shift,
+                is_double_shift=is_am_shift and is_pm_shift and self.total_hours >= 10,
+            )
+        return self._times
+
     @property
     def start_am_pm(self) -> str:
-        return "am" if self.start_time.hour < 12 else "pm"
+        return self.shift_times.start_am_pm
 
     @property
     def end_am_pm(self) -> str:
-        return "am" if self.end_time.hour < 12 else "pm"
+        return self.shift_times.end_am_pm
 
     @property
     def is_am_shift(self) -> bool:
-        return True if self.start_am_pm == "am" else False
+        return self.shift_times.is_am_shift
 
     @property
     def is_pm_shift(self) -> bool:
-        return True if self.start_am_pm == "pm" or self.end_time.hour >= 17 else False
+        return self.shift_times.is_pm_shift
 
     @property
     def is_double_shift(self) -> bool:
-        if self.is_am_shift and self.is_pm_shift:
-            return True if self.total_hours >= 10 else False
-        else:
-            return False
+        return self.shift_times.is_double_shift
+
+    # Role times fall back to the shift times when the description doesn't give any
+    @property
+    def role_times(self) -> _RoleTimes:
+        if self._roles is None:
+            shift_times = (self.start_time, self.end_time)
+            self._roles = _RoleTimes(
+                manager_on=(
+                    (self.description_class.manager_on_times or shift_times)
+                    if self.is_manager_on
+                    else None
+                ),
+                second_manager=(
+                    (self.description_class.second_manager_times or shift_times)
+                    if self.is_second_manager
+                    else None
+                ),
+                mod=shift_times if self.is_mod else None,
+            )
+        return self._roles
+
+    @property
+    def manager_start(self) -> datetime.time | None:
+        times = self.role_times.manager_on
+        return times[0] if times is not None else None
+
+    @property
+    def manager_end(self) -> datetime.time | None:
+        times = self.role_times.manager_on
+        return times[1] if times is not None else None
+
+    @property
+    def second_manager_start(self) -> datetime.time | None:
+        times = self.role_times.second_manager
+        return times[0] if times is not None else None
+
+    @property
+    def second_manager_end(self) -> datetime.time | None:
+        times = self.role_times.second_manager
+        return times[1] if times is not None else None
+
+    @property
+    def mod_start(self) -> datetime.time | None:
+        times = self.role_times.mod
+        return times[0] if times is not None else None
+
+    @property
+    def mod_end(self) -> datetime.time | None:
+        times = self.role_times.mod
+        return times[1] if times is not None else None
 
     # Properties defined by tests against description
     @property
     def is_manager_on(self) -> bool:
-        match = re.search(
-            self._description_regex("is_manager_on"),
-            self.description,
-            re.BESTMATCH | re.IGNORECASE,
-        )
-        return match is not None
+        return self.description_class.is_manager_on
 
     @property
     def manager_on_times(self) -> dict:
-        if not self._manager_start or not self._manager_end:
+        if self.role_times.manager_on is None:
             return self._get_description_times("manager_on_times", self.is_manager_on)
         else:
             return {
-                "start_time": self._manager_start,
-                "end_time": self._manager_end,
+                "start_time": self.manager_start,
+                "end_time": self.manager_end,
             }
 
     @manager_on_times.setter
     def manager_on_times(self, set_dict) -> None:
-        self._manager_start = set_dict["start_time"]
-        self._manager_end = set_dict["end_time"]
+        self._roles = self.role_times._replace(
+            manager_on=(set_dict["start_time"], set_dict["end_time"])
+        )
 
     @property
     def is_second_manager(self) -> bool:
-        match = re.search(
-            self._description_regex("is_second_manager"),
-            self.description,
-            re.BESTMATCH | re.IGNORECASE,
-        )
-        return match is not None
+        return self.description_class.is_second_manager
 
     @property
     def second_manager_times(self) -> dict:
@@ -290,17 +263,13 @@ class Shift:
 
     @second_manager_times.setter
     def second_manager_times(self, set_dict) -> None:
-        self._second_manager_start = set_dict["start_time"]
-        self._second_manager_end = set_dict["end_time"]
+        self._roles = self.role_times._replace(
+            second_manager=(set_dict["start_time"], set_dict["end_time"])
+        )
 
     @property
     def is_mod(self) -> bool:
-        match = re.search(
-            self._description_regex("mod"),
-            self.description,
-            re.BESTMATCH,
-        )
-        return match is not None
+        return self.description_class.is_mod
     
     @property
     def mod_times(self) -> dict:
@@ -311,39 +280,21 @@ class Shift:
     
     @mod_times.setter
     def mod_times(self, set_dict) -> None:
-        self._mod_start = set_dict["start_time"]
-        self._mod_end = set_dict["end_time"]
+        self._roles = self.role_times._replace(
+            mod=(set_dict["start_time"], set_dict["end_time"])
+        )
 
     @property
     def is_specified_shift(self) -> bool:
-        match = re.search(
-            self._description_regex("manager_shift_specifier"),
-            self.description,
-            re.BESTMATCH | re.IGNORECASE,
-        )
-        return match is not None
+        return self.description_class.is_specified_shift
     
     @property
     def specified_shift(self) -> int:
-        match = re.search(
-            self._description_regex("manager_shift_specifier"),
-            self.description,
-            re.BESTMATCH | re.IGNORECASE,
-        )
-        if match is not None:
-            if re.search("first|1st", match.group(1), re.IGNORECASE):
-                return 0
-            elif re.search("second|2nd", match.group(1), re.IGNORECASE):
-                return 1
-        return 99
+        return self.description_class.specified_shift
 
     #@property
     #def is_north_south_coord(self) -> bool:
-    #    match = re.search(
-    #        self._description_regex("is_north_south_coord"),
-    #        self.description,
-    #        re.BESTMATCH | re.IGNORECASE,
-    #    )
+    #    match = descriptions.search("is_north_south_coord", self.description)
     #    return match is not None
 
     #@property
@@ -363,23 +314,104 @@ class Shift:
     #@property
     #def coord_area(self) -> str | None:
     #    match = (
-    #        re.search(
-    #            self._description_regex("is_north_south_coord"),
-    #            self.description,
-    #            re.BESTMATCH | re.IGNORECASE,
-    #        )
+    #        descriptions.search("is_north_south_coord", self.description)
     #        if self.is_north_south_coord
     #        else None
     #    )
     #    return match.group("which").lower() if match is not None else None
 
 
+# Define our regex
+_schedule_regex = {
+    "swl": r"(?<=swl\()([^;]+)(?=\);)",
+    "shift_data": r'"([^"]*)"|\w[^",]*',
+    "shift_time": r"([0-9]{1,2}[:]?[0-9]{0,2}[a|p]m)",
+    "total_hours": r"([0-9]{0,2}[\.]{1}[0-9]{0,2})\s?hour[s]?",
+}
+
+# The week view has no per-record date; each day's records follow a link or header carrying the
+# day's date, so records belong to the last MM/DD/YYYY seen before them
+# (inferred from the page layout, retrieve_week checks it against the day view before using it)
+_week_records = re.compile(
+    r"(?P<date>\b(?:0?[1-9]|1[0-2])/(?:0?[1-9]|[12][0-9]|3[01])/20[0-9]{2}\b)"
+    r"|swl\((?P<swl>[^;]+)\);"
+)
+
+
+# (connect, read) seconds for every W2W request, so a hung page can't hold up a refresh (and
+# everything waiting on it) forever
+REQUEST_TIMEOUT = (10, 30)
+
+# Seconds before the week view is checked against the day view again
+WEEK_VIEW_RECHECK = 6 * 60 * 60
+
+
+# The Sunday-Saturday week W2W shows for a date
+def week_of(date: datetime.date) -> list[datetime.date]:
+    start = date - datetime.timedelta(days=(date.weekday() + 1) % 7)
+    return [start + datetime.timedelta(days=i) for i in range(7)]
+
+
+def _shift_key(shift: Shift) -> tuple:
+    return (shift.employee, shift._start_time_str, shift._end_time_str, shift.description)
+
+
+def _parse_shift(record: str) -> Shift:
+    parsed = re.findall(_schedule_regex["shift_data"], record)
+    return Shift(
+        # employee=parsed[3],
+        # Employee name needs to have any asterisks and leading/trailing whitespace removed
+        # TODO: Use the Employee class
+        employee=re.sub(r"^\s+|\s+$", "", re.sub(r"\*", "", parsed[3])),
+        start_time=re.findall(_schedule_regex["shift_time"], parsed[5])[0],
+        end_time=re.findall(_schedule_regex["shift_time"], parsed[5])[1],
+        total_hours=re.findall(_schedule_regex["total_hours"], parsed[6])[0],
+        description=parsed[7],
+    )
+
+
+# W2W returns no structure, but places all the shifts inside some javascript
+# We need to parse out the assigned shifts wrapped in the "swl();" functions
+# swl("380352058",2,"#000000","Jordan Myers","750227705","3pm - 10pm","   7.0 hours","North Coord")
+# TODO: determine identifiers for each piece of data
+def _parse_shifts(text: str) -> list:
+    return [_parse_shift(record) for record in re.findall(_schedule_regex["swl"], text)]
+
+
+# Split a week view page into {date: shifts} for the days in week
+# Records under a date outside the week are skipped. None if any record shows up before the
+# first date, or a day of the week isn't on the page (the layout isn't what we expect, e.g. a
+# week that doesn't start on Sunday)
+def _parse_week(text: str, week: list[datetime.date]) -> dict | None:
+    days = {date: [] for date in week}
+    shown = set()
+    current = None
+    seen_date = False
+    for match in _week_records.finditer(text):
+        if match.group("date") is not None:
+            date = datetime.datetime.strptime(match.group("date"), "%m/%d/%Y").date()
+            seen_date = True
+            current = date if date in days else None
+            if current is not None:
+                shown.add(current)
+            continue
+        if not seen_date:
+            return None
+        if current is not None:
+            days[current].append(_parse_shift(match.group("swl")))
+    if len(shown) != len(days):
+        return None
+    return days
+
+
 class W2WSession:
 
     def __init__(self, config: Config, debug: bool = False):
         self._w2wconf = config
         self._debug = debug
-        self._session = requests.Session()
+        # Reuse this process's W2W connection pool across sessions, but keep our own cookies so
+        # another session logging in can't clear them
+        self._session = clients.pooled_session("whentowork")
 
         # Determine if we already have cookies, and either add them to the session or login
         if hasattr(self._w2wconf, "cookies") and self._w2wconf.cookies is not None:
@@ -401,7 +433,7 @@ class W2WSession:
             f"{self._w2wconf.base_url}{self._w2wconf.dll}/home?"
             f"SID={self._w2wconf.session_id}"
         )
-        resp = self._session.get(url_string)
+        resp = self._session.get(url_string, timeout=REQUEST_TIMEOUT)
 
         # Handle login page (session expired), or security warnings
         if (
@@ -438,6 +470,7 @@ class W2WSession:
                 "captcha_required": "false",
             },
             allow_redirects=True,
+            timeout=REQUEST_TIMEOUT,
         )
 
         # Retrieve the SID and DLL, and store them in the config
@@ -467,57 +500,128 @@ class W2WSession:
                 level="debug",
             )
 
-        shifts = []
-
-        # Define our regex
-        _schedule_regex = {
-            "swl": r"(?<=swl\()([^;]+)(?=\);)",
-            "shift_data": r'"([^"]*)"|\w[^",]*',
-            "shift_time": r"([0-9]{1,2}[:]?[0-9]{0,2}[a|p]m)",
-            "total_hours": r"([0-9]{0,2}[\.]{1}[0-9]{0,2})\s?hour[s]?",
-        }
-
         # Attempt to load the position view for {date} with all filters reset except skill
+        return _parse_shifts(self._schedule_page(filter, date, view="Pos"))
+
+    # Load a schedule view; the position view is the one we know has swl data
+    def _schedule_page(self, filter: tuple, date, view: str) -> str:
         # URL string is broken out to easily see the components
         url_string = (
             f"{self._w2wconf.base_url}{self._w2wconf.dll}/mgrschedule?"
             f"SID={self._w2wconf.session_id}"
             f"&lmi="
             f"&Date={date}"
-            f"&View=Pos"  # Position view (we know this has swl data)
+            f"&View={view}"
             f"&SkillFilter={filter[1]}"  # Only show our specified filter
             f"&CatFilter=-1"  # Resets any category filter
             f"&StatFilter=-1"  # Resets any stat filter
         )
-        resp = self._session.get(url_string)
+        resp = self._session.get(url_string, timeout=REQUEST_TIMEOUT)
 
         ### IMPORTANT ###
         # Unescape the resp.text otherwise names with special characters will break the regex
-        unescaped_text = html.unescape(resp.text)
-
-        # W2W returns no structure, but places all the shifts inside some javascript
-        # We need to parse out the assigned shifts wrapped in the "swl();" functions
-        # swl("380352058",2,"#000000","Jordan Myers","750227705","3pm - 10pm","   7.0 hours","North Coord")
-        # TODO: determine identifiers for each piece of data
-        swl_data = re.findall(_schedule_regex["swl"], unescaped_text)
-
-        # Pull out the relevant data
-        for shift in swl_data:
-            parsed = re.findall(_schedule_regex["shift_data"], shift)
-            obj = Shift(
-                # employee=parsed[3],
-                # Employee name needs to have any asterisks and leading/trailing whitespace removed
-                # TODO: Use the Employee class
-                employee=re.sub(r"^\s+|\s+$", "", re.sub(r"\*", "", parsed[3])),
-                start_time=re.findall(_schedule_regex["shift_time"], parsed[5])[0],
-                end_time=re.findall(_schedule_regex["shift_time"], parsed[5])[1],
-                total_hours=re.findall(_schedule_regex["total_hours"], parsed[6])[0],
-                description=parsed[7],
+        return html.unescape(resp.text)
+
+    # Whether the week view parses the same as the day view: None until a week fetched in this
+    # process has been checked against one of its days, False turns the week view off
+    # Rechecked every WEEK_VIEW_RECHECK seconds, since W2W can change under a long-running
+    # process (the scheduler)
+    _week_view_ok: bool | None = None
+    _week_view_checked_at: float = 0.0
+    _week_view_lock = threading.Lock()
+
+    # Retrieve a whole week (Sunday-Saturday, the week containing date) for a filter in one request
+    # Returns {date: shifts}, or None if the week view couldn't be used (callers fall back to
+    # retrieve_schedule for each day)
+    def retrieve_week(self, filter: tuple, date: datetime.date) -> dict | None:
+        with W2WSession._week_view_lock:
+            if time.monotonic() - W2WSession._week_view_checked_at > WEEK_VIEW_RECHECK:
+                W2WSession._week_view_ok = None
+            verified = W2WSession._week_view_ok
+        if verified is False:
+            return None
+        if self._debug:
+            cmdline.logger(
+                f"Running filter "
+                f"{cmdline.colorize(filter[0], colors=[cmdline.cmd_colors.BOLD, cmdline.cmd_colors.OKBLUE])}"
+                f" ({filter[1]}) for the week of {date.strftime('%m/%d/%Y')}",
+                level="debug",
             )
 
-            shifts.append(obj)
-
-        return shifts
+        week = week_of(date)
+        days = _parse_week(
+            self._schedule_page(filter, date.strftime("%m/%d/%Y"), view="Week"), week
+        )
+        # A week without a single shift can't be told apart from a login page or a layout we
+        # don't parse, so the day view answers it
+        if days is None or not any(days.values()):
+            return None
+
+        if verified is None:
+            # Check the first and last days with shifts against the day view before trusting the
+            # week view, so records landing on the wrong day at either end of the week show up
+            with_shifts = [day for day in week if days[day]]
+            matches = all(
+                sorted(map(_shift_key, days[checked]))
+                == sorted(
+                    map(
+                        _shift_key,
+                        self.retrieve_schedule(filter, date=checked.strftime("%m/%d/%Y")),
+                    )
+                )
+                for checked in dict.fromkeys((with_shifts[0], with_shifts[-1]))
+            )
+            with W2WSession._week_view_lock:
+                # Other filters may be checking at the same time; a mismatch wins until the recheck
+                W2WSession._week_view_ok = matches and W2WSession._week_view_ok is not False
+                W2WSession._week_view_checked_at = time.monotonic()
+                verified = W2WSession._week_view_ok
+            if not matches:
+                cmdline.logger(
+                    "W2W week view didn't match the day view, fetching one day at a time"
+                )
+
+        return days if verified else None
+
+    # Retrieve every filter for a set of days, a week per request where the week view works
+    # Returns {date: {label: shifts}}
+    def retrieve_schedules_range(self, filters: list[tuple], dates: list) -> dict:
+        weeks: dict = {}
+        for date in dates:
+            weeks.setdefault(week_of(date)[0], []).append(date)
+
+        def _retrieve(filter: tuple, week_dates: list) -> dict:
+            days = self.retrieve_week(filter, week_dates[0])
+            if days is None:
+                days = {
+                    date: self.retrieve_schedule(filter, date=date.strftime("%m/%d/%Y"))
+                    for date in week_dates
+                }
+            return days
+
+        with ThreadPoolExecutor(max_workers=max(len(filters), 1)) as executor:
+            futures = [
+                (filter[0], executor.submit(_retrieve, filter, week_dates))
+                for week_dates in weeks.values()
+                for filter in filters
+            ]
+
+        schedules = {date: {filter[0]: [] for filter in filters} for date in dates}
+        for label, future in futures:
+            for date, shifts in future.result().items():
+                if date in schedules:
+                    schedules[date][label] = shifts
+        return schedules
+
+    # Retrieve the schedule for every filter at once over the shared session
+    # Filters should be a list of (label, filter id) tuples, returns {label: shifts}
+    def retrieve_schedules(self, filters: list[tuple], date="Today") -> dict:
+        with ThreadPoolExecutor(max_workers=max(len(filters), 1)) as executor:
+            futures = {
+                filter[0]: executor.submit(self.retrieve_schedule, filter, date=date)
+                for filter in filters
+            }
+        return {label: future.result() for label, future in futures.items()}
 
     @property
     def w2wconf(self) -> Config:
@@ -534,8 +638,7 @@ if __name__ == "__main__":
     session = W2WSession(config.whentowork, debug=True)
 
     debug_shifts: dict = {}
-    for filter in session.w2wconf.filters.items():
-        shifts = session.retrieve_schedule(filter)
-        debug_shifts[filter[0]] = [shift.to_dict for shift in shifts]
+    for label, shifts in session.retrieve_schedules(list(session.w2wconf.filters.items())).items():
+        debug_shifts[label] = [shift.to_dict for shift in shifts]
 
     print(json.dumps(debug_shifts, indent=2, default=str))